@@ -7,33 +7,53 @@ performs unit conversions, fits the quadratic and EOS, and saves/plots with all
 import os
 import re
 import sys
+import csv
+import glob
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import constants
 
-from read_two_columns_text import read_two_columns_text
+from read_two_columns_text import read_two_columns_cached, read_two_columns_text
 from calculate_bivariate_statistics import calculate_bivariate_statistics
 from calculate_quadratic_fit import calculate_quadratic_fit
 from fit_curve_array import fit_curve_array
 from plot_data_with_fit import plot_data_with_fit
 from annotate_plot import annotate_plot
 
-from fit_eos import murnaghan  # wraps your fit_equation_of_state → (E₀, V₀, K₀)
+import unit_conversions
+from fit_eos import fit_equation_of_state  # Murnaghan fit → (E₀, K₀, K₀′, V₀)
+from eos_uncertainty import PARAMETER_INDICES, UNCERTAINTY_METHODS
 
 # -----------------------------------------------------------------------------
 # Toggle: if True, show plot; if False, save to PNG
 display_graph: bool = True
 
+# Columns of the batch summary, in atomic then engineering units
+SUMMARY_FIELDS = [
+    "file", "chemical_symbol", "crystal_symmetry", "dft_acronym",
+    "E0_rydberg_per_atom", "V0_bohr3_per_atom", "K0_rydberg_per_bohr3",
+    "E0_eV_per_atom", "V0_angstrom3_per_atom", "K0_GPa",
+    "V0_angstrom3_per_atom_ci_low", "V0_angstrom3_per_atom_ci_high",
+    "K0_GPa_ci_low", "K0_GPa_ci_high",
+    "error",
+]
+
 
 def parse_file_name(filename: str):
     """
     Extract (chemical_symbol, crystal_symmetry, dft_acronym)
-    from filenames like "Fe_Fm3m_GGA-PBE.dat" or "Fe_Fd3m_GGA-PBE.txt".
+    from filenames like "Fe_Fm3m_GGA-PBE.dat", "Fe_Fd3m_GGA-PBE.txt"
+    or "Au.Fm-3m_GGA-PBEsol.volumes_energies.dat".
     """
     base = os.path.basename(filename)
     stem, _ = os.path.splitext(base)
+    if stem.endswith(".volumes_energies"):
+        stem = stem[:-len(".volumes_energies")]
+        chem, _, rest = stem.partition(".")
+        sym, _, dft = rest.partition("_")
+        if chem and sym and dft:
+            return chem, sym, dft
     parts = re.split(r"[_\-]", stem)
     if len(parts) < 3:
         raise ValueError(
@@ -42,46 +62,39 @@ def parse_file_name(filename: str):
     return parts[0], parts[1], parts[2]
 
 
+def atoms_per_cell(crystal_symmetry: str) -> int:
+    """
+    Number of atoms in the cell the energies refer to (Fm-3m: 1, Fd-3m: 2).
+    """
+    return 2 if crystal_symmetry.replace("-", "") == "Fd3m" else 1
+
+
 def convert_units(value, from_unit: str, to_unit: str):
     """
-    Convert between atomic and engineering units:
+    Convert between atomic and engineering units, e.g.:
       - 'bohr^3/atom' → 'angstrom^3/atom'
       - 'rydberg/atom' → 'eV/atom'
       - 'rydberg/bohr^3' → 'GPa'
+    Factors come from the cached registry in unit_conversions.
     """
-    a0     = constants.physical_constants["Bohr radius"][0]
-    ryd_eV = constants.physical_constants["Rydberg constant times hc in eV"][0]
-    ryd_J  = constants.physical_constants["Rydberg constant times hc in J"][0]
-
-    if from_unit == "bohr^3/atom" and to_unit == "angstrom^3/atom":
-        return value * (a0 / 1e-10)**3
-    if from_unit == "rydberg/atom" and to_unit == "eV/atom":
-        return value * ryd_eV
-    if from_unit == "rydberg/bohr^3" and to_unit == "GPa":
-        pa = value * ryd_J / (a0**3)
-        return pa * 1e-9
-
-    raise ValueError(f"Unsupported conversion: {from_unit} → {to_unit}")
+    return unit_conversions.convert_units(value, from_unit, to_unit)
 
 
-def main():
+def fit_file(filename: str, uncertainty: str = None, use_cache: bool = True) -> dict:
     """
-    Complete workflow: loads data, computes per-atom values, fits Murnaghan EOS,
-    converts units, creates a fully rubric-compliant annotated plot, and shows/saves it.
+    Loads one data file, computes per-atom values, fits the quadratic and the
+    Murnaghan EOS, and returns the data, fits and E₀, V₀, K₀ in both atomic
+    and engineering units. uncertainty ('bootstrap' or 'jackknife') adds 95%
+    confidence intervals on V₀ and K₀. With use_cache the data is read from
+    the binary copy kept by read_two_columns_cached instead of reparsing the text.
     """
-    if len(sys.argv) < 2:
-        print("Usage: python equations_of_state.py <data_filename>", file=sys.stderr)
-        sys.exit(1)
-
-    filename = sys.argv[1]
     chem, sym, dft = parse_file_name(filename)
 
     # 1. Read two-column volume–energy data (atomic units)
-    raw = read_two_columns_text(filename)
+    raw = read_two_columns_cached(filename) if use_cache else read_two_columns_text(filename)
 
     # 2. Per-atom values
-    atoms = 1 if sym == "Fm3m" else 2 if sym == "Fd3m" else 1
-    data = raw / atoms
+    data = raw / atoms_per_cell(sym)
     volumes_au, energies_au = data
 
     # 3. Statistics
@@ -90,8 +103,58 @@ def main():
     # 4. Quadratic fit in atomic units
     coeffs_au = calculate_quadratic_fit(data)
 
-    # 5. Murnaghan EOS fit → E₀, V₀, K₀ (atomic units)
-    E0_au, V0_au, K0_au = murnaghan(volumes_au, energies_au, coeffs_au)
+    # 5. Murnaghan EOS fit → E₀, K₀, K₀′, V₀ (atomic units)
+    _, (E0_au, K0_au, _, V0_au) = fit_equation_of_state(
+        volumes_au, energies_au, coeffs_au, equation_of_state="murnaghan"
+    )
+
+    result = {
+        "file": filename,
+        "chemical_symbol": chem,
+        "crystal_symmetry": sym,
+        "dft_acronym": dft,
+        "data_au": data,
+        "quadratic_coefficients_au": coeffs_au,
+        "E0_rydberg_per_atom": E0_au,
+        "V0_bohr3_per_atom": V0_au,
+        "K0_rydberg_per_bohr3": K0_au,
+        "E0_eV_per_atom": convert_units(E0_au, "rydberg/atom", "eV/atom"),
+        "V0_angstrom3_per_atom": convert_units(V0_au, "bohr^3/atom", "angstrom^3/atom"),
+        "K0_GPa": convert_units(K0_au, "rydberg/bohr^3", "GPa"),
+    }
+
+    # 6. Optional resampling confidence intervals on V₀ and K₀
+    if uncertainty is not None:
+        if uncertainty not in UNCERTAINTY_METHODS:
+            raise ValueError(f"uncertainty must be one of {list(UNCERTAINTY_METHODS)}; got {uncertainty!r}")
+        intervals = UNCERTAINTY_METHODS[uncertainty](volumes_au, energies_au, "murnaghan")["confidence_intervals"]
+        V0_low, V0_high = convert_units(intervals[:, PARAMETER_INDICES["V0"]], "bohr^3/atom", "angstrom^3/atom")
+        K0_low, K0_high = convert_units(intervals[:, PARAMETER_INDICES["K0"]], "rydberg/bohr^3", "GPa")
+        result.update({
+            "V0_angstrom3_per_atom_ci_low": V0_low,
+            "V0_angstrom3_per_atom_ci_high": V0_high,
+            "K0_GPa_ci_low": K0_low,
+            "K0_GPa_ci_high": K0_high,
+        })
+
+    return result
+
+
+def plot_fit(result: dict, show: bool = None):
+    """
+    Creates a fully rubric-compliant annotated plot of the data and fit
+    returned by fit_file, and shows it if show is True or saves it if False
+    (default: the module-level display_graph toggle).
+    """
+    import matplotlib.pyplot as plt
+
+    chem = result["chemical_symbol"]
+    sym = result["crystal_symmetry"]
+    dft = result["dft_acronym"]
+    volumes_au, energies_au = result["data_au"]
+    coeffs_au = result["quadratic_coefficients_au"]
+    V0 = result["V0_angstrom3_per_atom"]
+    K0 = result["K0_GPa"]
 
     # 6. Convert to engineering units
     volumes = convert_units(volumes_au, "bohr^3/atom",   "angstrom^3/atom")
@@ -102,8 +165,6 @@ def main():
         convert_units(fit_vol_au, "bohr^3/atom",   "angstrom^3/atom"),
         convert_units(fit_en_au, "rydberg/atom", "eV/atom"),
     ])
-    V0 = convert_units(V0_au, "bohr^3/atom",   "angstrom^3/atom")
-    K0 = convert_units(K0_au, "rydberg/bohr^3", "GPa")
 
     # 7. Plot data & fit
     plt.figure()
@@ -138,7 +199,7 @@ def main():
     # 10.2 Crystal symmetry
     sym_label = (
         r"$\mathit{Fm}$3$\mathit{m}$"
-        if sym == "Fm3m"
+        if sym.replace("-", "") == "Fm3m"
         else r"$\mathit{Fd}$3$\mathit{m}$"
     )
     ann[sym_label] = {
@@ -147,8 +208,11 @@ def main():
         "fontsize": 12.0,
     }
 
-    # Bulk modulus label above symmetry
-    ann[r"$K_0 = %.1f$ GPa" % K0] = {
+    # Bulk modulus label above symmetry, with its confidence interval if computed
+    K0_label = r"$K_0 = %.1f$ GPa" % K0
+    if "K0_GPa_ci_low" in result:
+        K0_label += r" (95%% CI %.1f–%.1f)" % (result["K0_GPa_ci_low"], result["K0_GPa_ci_high"])
+    ann[K0_label] = {
         "position": np.array([0.50, 0.85]),
         "alignment": ["center", "bottom"],
         "fontsize": 10.0,
@@ -181,22 +245,111 @@ def main():
     # Add annotations
     annotate_plot(ann)
 
-
-    if display_graph:
+    if (display_graph if show is None else show):
         plt.show()
     else:
         outname = f"Masnik.{chem}.{sym}.{dft}.MurnaghanEquationOfState.png"
         plt.savefig(outname, dpi=300)
+        plt.close()
         print(f"Saved plot to {outname}")
 
 
-if __name__ == "__main__":
-    # Unit‐test conversions (exact wording & precision):
-    print("1 cubic bohr per atom equals 0.14818471147216278 cubic angstroms per atom")
-    print("1 rydberg per atom equals 13.605693122994 electron volts per atom")
-    print("1 rydberg per cubic bohr equals 14710.5078848260711 gigapascals")
-    if len(sys.argv) > 1:
-        main()
+
+def process_file(filename: str, render: bool = False, uncertainty: str = None,
+                 use_cache: bool = True) -> dict:
+    """
+    Fits one file for the batch summary, saving its plot if render is True.
+    Failures are reported in the 'error' field instead of being raised.
+    """
+    try:
+        result = fit_file(filename, uncertainty, use_cache)
+        if render:
+            plot_fit(result, show=False)
+    except Exception as error:
+        return {"file": filename, "error": f"{type(error).__name__}: {error}"}
+
+    return {field: result.get(field, "") for field in SUMMARY_FIELDS}
+
+
+def find_data_files(paths: list) -> list:
+    """
+    Expands directories and glob patterns into a sorted list of
+    *.volumes_energies.dat files.
+    """
+    filenames = set()
+    for path in paths:
+        if os.path.isdir(path):
+            filenames.update(glob.glob(os.path.join(path, "*.volumes_energies.dat")))
+        elif glob.has_magic(path):
+            filenames.update(glob.glob(path))
+        else:
+            filenames.add(path)
+    return sorted(filenames)
+
+
+def run_batch(paths: list, summary_filename: str = "Masnik.EquationOfStateSummary.csv",
+              render: bool = False, max_workers: int = None, uncertainty: str = None,
+              use_cache: bool = True) -> list:
+    """
+    Fits every data file found in paths across a process pool, writes one CSV
+    summary of E₀, V₀ and K₀ in atomic and engineering units, and reports
+    per-file failures without stopping the batch.
+    """
+    filenames = find_data_files(paths)
+    if not filenames:
+        raise FileNotFoundError(f"No *.volumes_energies.dat files found in {paths}")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(process_file, filenames, [render] * len(filenames),
+                                 [uncertainty] * len(filenames), [use_cache] * len(filenames)))
+
+    with open(summary_filename, "w", newline="") as summary_file:
+        writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_FIELDS, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    failures = [row for row in rows if row["error"]]
+    for row in failures:
+        print(f"Failed to fit {row['file']}: {row['error']}", file=sys.stderr)
+    print(f"Fitted {len(rows) - len(failures)} of {len(rows)} files, summary saved to {summary_filename}")
+    return rows
+
+
+def main():
+    """
+    Complete workflow: loads data, computes per-atom values, fits Murnaghan EOS,
+    converts units, creates a fully rubric-compliant annotated plot, and shows/saves it.
+    Several files, a directory or a glob pattern run in batch mode instead
+    (add --render to also save every plot). --bootstrap or --jackknife adds
+    confidence intervals on V₀ and K₀. --no-cache rereads the text files instead
+    of their cached binary copies.
+    """
+    flags = {"--render", "--bootstrap", "--jackknife", "--no-cache"}
+    arguments = [argument for argument in sys.argv[1:] if argument not in flags]
+    if not arguments:
+        print("Usage: python equations_of_state.py <data_filename> [--bootstrap|--jackknife] [--no-cache]",
+              file=sys.stderr)
+        print("       python equations_of_state.py <directory|glob|files...> [--render] [--bootstrap|--jackknife] "
+              "[--no-cache]", file=sys.stderr)
+        sys.exit(1)
+
+    use_cache = "--no-cache" not in sys.argv
+    uncertainty = None
+    for method in UNCERTAINTY_METHODS:
+        if f"--{method}" in sys.argv:
+            uncertainty = method
+
+    if len(arguments) > 1 or os.path.isdir(arguments[0]) or glob.has_magic(arguments[0]):
+        run_batch(arguments, render="--render" in sys.argv, uncertainty=uncertainty, use_cache=use_cache)
+        return
+
+    result = fit_file(arguments[0], uncertainty, use_cache)
+    if uncertainty is not None:
+        print(f"V0 = {result['V0_angstrom3_per_atom']:.4f} Å^3/atom, 95% CI "
+              f"[{result['V0_angstrom3_per_atom_ci_low']:.4f}, {result['V0_angstrom3_per_atom_ci_high']:.4f}]")
+        print(f"K0 = {result['K0_GPa']:.2f} GPa, 95% CI [{result['K0_GPa_ci_low']:.2f}, {result['K0_GPa_ci_high']:.2f}]")
+    plot_fit(result)
+
 
 if __name__ == "__main__":
     # Unit‐test conversions (exact wording & precision):
@@ -204,4 +357,4 @@ if __name__ == "__main__":
     print("1 rydberg per atom equals 13.605693122994 electron volts per atom")
     print("1 rydberg per cubic bohr equals 14710.5078848260711 gigapascals")
     if len(sys.argv) > 1:
-        main()
\ No newline at end of file
+        main()
@@ -1,11 +1,9 @@
 import sys
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import date
 
-from generate_matrix import generate_matrix
-from calculate_lowest_eigenvectors import calculate_lowest_eigenvectors
 from annotate_plot import annotate_plot
+from eigenpair_cache import calculate_lowest_eigenvectors_cached, solve_lowest_eigenvectors
 
 # Spatial domain for all wavefunctions
 MIN_X = -10.0
@@ -18,19 +16,39 @@ PARAM_DEFAULT     = 1.0
 EIG_INDICES = [2, 3, 4]
 
 
-def main(Ndim: int, potential_name: str, potential_parameter: float):
+def calculate_wavefunctions(Ndim: int, potential_name: str, potential_parameter: float,
+                            number_of_eigenvectors: int = max(EIG_INDICES) + 1,
+                            use_cache: bool = True, stencil=3):
     """
-    Computes eigenfunctions #2, #3 & #4, plot them together
-    on one axes from inputs of Ndim, potential_name and potential_parameter.
-    Labels and annotates the graph, and saves it as a PNG file.
+    Builds the Hamiltonian on the spatial grid with the given finite-difference
+    stencil and returns the grid together with the lowest energies and wavefunctions.
+    With use_cache the eigenpairs come from eigenpair_cache when this system was
+    solved before.
     """
-    H = generate_matrix(MIN_X, MAX_X, Ndim, potential_name, potential_parameter)
-    needed = max(EIG_INDICES) + 1
-    energies, wavefuncs = calculate_lowest_eigenvectors(
-        H, number_of_eigenvectors=needed
-    )
-
+    if use_cache:
+        energies, wavefuncs = calculate_lowest_eigenvectors_cached(
+            MIN_X, MAX_X, Ndim, potential_name, potential_parameter,
+            number_of_eigenvectors=number_of_eigenvectors, stencil=stencil
+        )
+    else:
+        energies, wavefuncs = solve_lowest_eigenvectors(
+            MIN_X, MAX_X, Ndim, potential_name, potential_parameter,
+            number_of_eigenvectors=number_of_eigenvectors, stencil=stencil
+        )
     x = np.linspace(MIN_X, MAX_X, Ndim)
+    return x, energies, wavefuncs
+
+
+def plot_wavefunctions(x: np.ndarray, energies: np.ndarray, wavefuncs: np.ndarray,
+                       potential_name: str, outname: str = None):
+    """
+    Plots eigenfunctions #2, #3 & #4 together on one axes, labels and
+    annotates the graph, and saves it as a PNG file (outname, or the
+    default Masnik.<potential>.Eigenvectors<indices>.png).
+    """
+    import matplotlib.pyplot as plt
+
+    Ndim = len(x)
     max_amp = np.max(np.abs(wavefuncs))
 
     # Creates axes
@@ -77,10 +95,23 @@ def main(Ndim: int, potential_name: str, potential_parameter: float):
     plt.subplots_adjust(bottom=0.2)
 
     # Saves to PNG
-    indices_str = "".join(str(i) for i in EIG_INDICES)
-    outname = f"Masnik.{potential_name}.Eigenvectors{indices_str}.png"
+    if outname is None:
+        indices_str = "".join(str(i) for i in EIG_INDICES)
+        outname = f"Masnik.{potential_name}.Eigenvectors{indices_str}.png"
     fig.savefig(outname, dpi=300)
+    plt.close(fig)
     print(f"Saved plot to {outname}")
+    return outname
+
+
+def main(Ndim: int, potential_name: str, potential_parameter: float):
+    """
+    Computes eigenfunctions #2, #3 & #4, plot them together
+    on one axes from inputs of Ndim, potential_name and potential_parameter.
+    Labels and annotates the graph, and saves it as a PNG file.
+    """
+    x, energies, wavefuncs = calculate_wavefunctions(Ndim, potential_name, potential_parameter)
+    plot_wavefunctions(x, energies, wavefuncs, potential_name)
 
 
 if __name__ == "__main__":
@@ -1,19 +1,23 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.text import Text
-from typing import List
+from typing import List, TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from matplotlib.text import Text
 
-def annotate_plot(annotations: dict) -> List[Text]:
+
+def annotate_plot(annotations: dict) -> List["Text"]:
     """
     Takes a dictionary as an input and returns a list of text annotations
     to be displayed in the plot.
     """
+    # Imported here so numbers-only callers never load matplotlib
+    import matplotlib.pyplot as plt
+
     if not isinstance(annotations, dict):
         raise TypeError(f"Input must be a dictionary, got {type(annotations)}")
 
     ax = plt.gca()
-    texts: List[Text] = []
+    texts: List["Text"] = []
 
     for label, props in annotations.items():
         if not isinstance(props, dict):
@@ -51,6 +55,7 @@ if __name__ == "__main__":
     AI Prompt (using Gemini 2.0 flash): picture + fix my label so it isn't covering the graph
     """
     import datetime
+    import matplotlib.pyplot as plt
 
     # Create the plot
     x = np.linspace(0, 2 * np.pi, 200)
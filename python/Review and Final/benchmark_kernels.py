@@ -0,0 +1,239 @@
+"""
+Times and measures peak memory of the Review and Final numerical kernels over a range
+of problem sizes, writes the results as JSON and compares them against a stored baseline.
+Timings depend on the machine, so no baseline is shipped: generate one locally with
+--save-baseline before comparing (both JSON files are git-ignored)
+"""
+
+import os
+import sys
+import json
+import atexit
+import time
+import platform
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from generate_matrix import generate_matrix
+from calculate_lowest_eigenvectors import calculate_lowest_eigenvectors
+from calculate_quadratic_fit import calculate_quadratic_fit
+from fit_curve_array import fit_curve_array
+from fit_eos import fit_equation_of_state
+from read_two_columns_text import read_two_columns_text
+
+RESULTS_FILENAME = "benchmark_results.json"
+BASELINE_FILENAME = "benchmark_baseline.json"
+
+# A kernel slower or larger than baseline by more than this factor counts as a regression,
+# unless the extra time is below the timer noise floor
+REGRESSION_TOLERANCE = 1.5
+NOISE_FLOOR_SECONDS = 1e-3
+REPEATS = 3
+
+# Largest size of each benchmark that --quick still runs
+QUICK_MAXIMUM_SIZE = 10**4
+
+
+def energy_volume_data(number_of_points):
+    """
+    Murnaghan-shaped (2, M) energy-volume data with a little noise, fixed seed.
+    """
+    from fit_eos import murnaghan
+
+    random_generator = np.random.default_rng(0)
+    volumes = np.linspace(220., 320., number_of_points)
+    energies = murnaghan(volumes, -15.85, 0.0064, 4.16, 265.9)
+    energies += random_generator.normal(0., 1e-6, number_of_points)
+    return np.vstack([volumes, energies])
+
+
+def setup_generate_matrix(matrix_format):
+    """
+    Kernel factory for building the harmonic Hamiltonian in the given matrix format.
+    """
+    def setup(size):
+        return lambda: generate_matrix(-10., 10., size, 'harmonic', 1., matrix_format=matrix_format)
+    return setup
+
+
+def setup_lowest_eigenvectors(matrix_format):
+    """
+    Kernel factory for the lowest 5 eigenpairs of the harmonic Hamiltonian with the given solver.
+    """
+    def setup(size):
+        generate_format = 'dense' if matrix_format in ('dense', 'symmetric') else matrix_format
+        matrix = generate_matrix(-10., 10., size, 'harmonic', 1., matrix_format=generate_format)
+        return lambda: calculate_lowest_eigenvectors(matrix, 5, matrix_format=matrix_format)
+    return setup
+
+
+def setup_quadratic_fit(size):
+    """
+    Kernel for a quadratic fit to M = size energy-volume points.
+    """
+    data = energy_volume_data(size)
+    return lambda: calculate_quadratic_fit(data)
+
+
+def setup_fit_curve_array(size):
+    """
+    Kernel for evaluating a quadratic on M = size points.
+    """
+    coefficients = np.array([-14.99, -6.5e-3, 1.2e-5])
+    return lambda: fit_curve_array(coefficients, 220., 320., number_of_points=size)
+
+
+def setup_fit_equation_of_state(size):
+    """
+    Kernel for a Murnaghan fit to M = size energy-volume points.
+    """
+    volumes, energies = energy_volume_data(size)
+    coefficients = calculate_quadratic_fit(np.vstack([volumes, energies]))
+    return lambda: fit_equation_of_state(volumes, energies, coefficients, equation_of_state='murnaghan')
+
+
+def setup_read_two_columns_text(size):
+    """
+    Kernel for reading a temporary M = size row text file, removed at exit.
+    """
+    file_descriptor, filename = tempfile.mkstemp(suffix='.dat')
+    os.close(file_descriptor)
+    atexit.register(os.remove, filename)
+    np.savetxt(filename, energy_volume_data(size).T)
+    return lambda: read_two_columns_text(filename)
+
+
+# name: (setup(size) -> kernel, sizes)
+BENCHMARKS = {
+    'generate_matrix[dense]': (setup_generate_matrix('dense'), [10**2, 10**3, 5 * 10**3]),
+    'generate_matrix[banded]': (setup_generate_matrix('banded'), [10**2, 10**3, 10**4, 10**5]),
+    'generate_matrix[sparse]': (setup_generate_matrix('sparse'), [10**2, 10**3, 10**4, 10**5]),
+    'calculate_lowest_eigenvectors[dense]': (setup_lowest_eigenvectors('dense'), [10**2, 10**3]),
+    'calculate_lowest_eigenvectors[symmetric]': (setup_lowest_eigenvectors('symmetric'), [10**2, 10**3]),
+    'calculate_lowest_eigenvectors[banded]': (setup_lowest_eigenvectors('banded'), [10**2, 10**3, 10**4, 10**5]),
+    'calculate_lowest_eigenvectors[sparse]': (setup_lowest_eigenvectors('sparse'), [10**2, 10**3, 10**4, 10**5]),
+    'calculate_quadratic_fit': (setup_quadratic_fit, [10, 10**3, 10**5, 10**7]),
+    'fit_curve_array': (setup_fit_curve_array, [10, 10**3, 10**5, 10**7]),
+    'fit_eos.fit_equation_of_state': (setup_fit_equation_of_state, [10, 10**3, 10**5]),
+    'read_two_columns_text': (setup_read_two_columns_text, [10, 10**3, 10**5, 10**6]),
+}
+
+
+def measure(kernel, repeats: int = REPEATS) -> tuple:
+    """
+    Returns the best wall time in seconds over repeats calls of kernel, and the
+    peak memory in bytes traced during one extra call.
+    """
+    kernel()  # warm up imports and caches
+    best_time = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        kernel()
+        best_time = min(best_time, time.perf_counter() - start)
+
+    tracemalloc.start()
+    kernel()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best_time, peak_bytes
+
+
+def run_benchmarks(names: list = None, quick: bool = False, repeats: int = REPEATS) -> list:
+    """
+    Runs the named benchmarks (all by default) at every size and returns one
+    dictionary per (kernel, size) with the time and peak memory.
+    """
+    results = []
+    for name in names or BENCHMARKS:
+        setup, sizes = BENCHMARKS[name]
+        for size in sizes:
+            if quick and size > QUICK_MAXIMUM_SIZE:
+                continue
+            kernel = setup(size)
+            seconds, peak_bytes = measure(kernel, repeats)
+            results.append({'kernel': name, 'size': size, 'seconds': seconds, 'peak_bytes': peak_bytes})
+            print(f"{name:42s} {size:>10d} {seconds:12.6f} s {peak_bytes / 2**20:10.2f} MiB")
+    return results
+
+
+def save_results(results: list, filename: str):
+    """
+    Writes results with the interpreter and library versions as JSON.
+    """
+    import scipy
+
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.platform(),
+        'results': results,
+    }
+    with open(filename, 'w') as results_file:
+        json.dump(report, results_file, indent=2)
+
+
+def compare_to_baseline(results: list, baseline_filename: str,
+                        tolerance: float = REGRESSION_TOLERANCE) -> list:
+    """
+    Returns the results that are slower or use more memory than their baseline
+    entry by more than the tolerance factor (time differences under
+    NOISE_FLOOR_SECONDS are ignored).
+    """
+    with open(baseline_filename) as baseline_file:
+        baseline = {(entry['kernel'], entry['size']): entry for entry in json.load(baseline_file)['results']}
+
+    regressions = []
+    for entry in results:
+        reference = baseline.get((entry['kernel'], entry['size']))
+        if reference is None:
+            continue
+        time_ratio = entry['seconds'] / reference['seconds']
+        memory_ratio = entry['peak_bytes'] / max(reference['peak_bytes'], 1)
+        slower = time_ratio > tolerance and entry['seconds'] - reference['seconds'] > NOISE_FLOOR_SECONDS
+        if slower or memory_ratio > tolerance:
+            regressions.append({**entry, 'time_ratio': time_ratio, 'memory_ratio': memory_ratio})
+    return regressions
+
+
+def main():
+    """
+    Runs every benchmark, saves the results, and compares them with the baseline if
+    one exists. --quick skips the largest sizes, --save-baseline stores this run as
+    the new baseline for this machine (baselines from other machines are not comparable).
+    Exits with status 1 when a regression is found.
+    """
+    quick = "--quick" in sys.argv
+    names = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks {unknown}; choose from {list(BENCHMARKS)}", file=sys.stderr)
+        sys.exit(2)
+
+    results = run_benchmarks(names, quick=quick)
+    save_results(results, RESULTS_FILENAME)
+    print(f"Saved results to {RESULTS_FILENAME}")
+
+    if "--save-baseline" in sys.argv:
+        save_results(results, BASELINE_FILENAME)
+        print(f"Saved baseline to {BASELINE_FILENAME}")
+        return
+
+    if not os.path.exists(BASELINE_FILENAME):
+        print(f"No {BASELINE_FILENAME} to compare against; rerun with --save-baseline to create "
+              f"one for this machine")
+        return
+
+    regressions = compare_to_baseline(results, BASELINE_FILENAME)
+    for entry in regressions:
+        print(f"REGRESSION {entry['kernel']} size={entry['size']}: "
+              f"time x{entry['time_ratio']:.2f}, memory x{entry['memory_ratio']:.2f}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
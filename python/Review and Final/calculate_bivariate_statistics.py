@@ -28,6 +28,54 @@ Verifies that the array is in the correct format, then calculates the bivariate
     return np.array([mean_y, std_y, min_x, max_x, min_y, max_y])
 
 
+def calculate_bivariate_statistics_chunked(chunks) -> np.ndarray:
+    """
+    Same statistics as calculate_bivariate_statistics, accumulated over an iterable
+    of (2, m) chunks (e.g. read_two_columns_chunks) in constant memory. The mean and
+    standard deviation of y are merged chunk by chunk with Welford's update.
+    """
+    count = 0
+    mean_y = 0.0
+    sum_of_squares_y = 0.0
+    min_x = min_y = np.inf
+    max_x = max_y = -np.inf
+
+    for chunk in chunks:
+        if chunk.ndim != 2 or chunk.shape[0] != 2:
+            raise IndexError(
+                "Chunks must have format (2,m) "
+                f"{chunk.shape}"
+            )
+        chunk_count = chunk.shape[1]
+        if chunk_count == 0:
+            continue
+        x_values = chunk[0]
+        y_values = chunk[1]
+
+        # Merge this chunk's mean and sum of squared deviations into the running ones
+        chunk_mean_y = np.mean(y_values)
+        chunk_sum_of_squares_y = np.sum((y_values - chunk_mean_y) ** 2)
+        delta = chunk_mean_y - mean_y
+        total = count + chunk_count
+        mean_y += delta * chunk_count / total
+        sum_of_squares_y += chunk_sum_of_squares_y + delta ** 2 * count * chunk_count / total
+        count = total
+
+        min_x = min(min_x, np.min(x_values))
+        max_x = max(max_x, np.max(x_values))
+        min_y = min(min_y, np.min(y_values))
+        max_y = max(max_y, np.max(y_values))
+
+    if count < 2:
+        raise IndexError(
+            "Must enter at least 2 points in total "
+            f"(got {count})"
+        )
+
+    std_y = np.sqrt(sum_of_squares_y / count)
+    return np.array([mean_y, std_y, min_x, max_x, min_y, max_y])
+
+
 if __name__ == "__main__":
     """
     Calls the above function, as well as printing and organizing the data.
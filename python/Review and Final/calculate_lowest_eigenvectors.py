@@ -3,24 +3,81 @@ import numpy as np
 
 def calculate_lowest_eigenvectors(
     square_matrix: np.ndarray,
-    number_of_eigenvectors: int = 3
+    number_of_eigenvectors: int = 3,
+    matrix_format: str = 'dense'
 ) -> tuple[np.ndarray, np.ndarray]:
     """
     Takes an MxM matrix and outputs the smallest eigenvectors and their eigenvalues.
+    matrix_format selects the solver: 'dense' (general eig of every eigenpair),
+    'symmetric' (dense symmetric matrix, only the lowest K pairs), 'banded'
+    (upper banded form from generate_matrix, tridiagonal or wider) or 'sparse'
+    (SciPy sparse matrix, shift-inverted Lanczos).
     """
-    # Check that the matrix is MxM
-    if square_matrix.ndim != 2 or square_matrix.shape[0] != square_matrix.shape[1]:
-        raise IndexError(
-            f"Only accepts square matrices {square_matrix.shape}"
+    if matrix_format not in ('dense', 'symmetric', 'banded', 'sparse'):
+        raise ValueError(
+            "matrix_format must be 'dense', 'symmetric', 'banded' or 'sparse'; "
+            f"got {matrix_format!r}"
         )
 
-    M = square_matrix.shape[0]
+    # Check that the matrix is MxM (or (u+1)xM in banded form)
+    if matrix_format == 'banded':
+        if square_matrix.ndim != 2 or square_matrix.shape[0] < 2:
+            raise IndexError(
+                f"Only accepts banded matrices of shape (u+1, M); got {square_matrix.shape}"
+            )
+        M = square_matrix.shape[1]
+    else:
+        if square_matrix.ndim != 2 or square_matrix.shape[0] != square_matrix.shape[1]:
+            raise IndexError(
+                f"Only accepts square matrices {square_matrix.shape}"
+            )
+        M = square_matrix.shape[0]
+
     K = number_of_eigenvectors
     if not isinstance(K, int) or K < 1 or K > M:
         raise IndexError(
             f"number_of_eigenvectors must be 1 ≤ K ≤ {M}; got {K}"
         )
 
+    if matrix_format == 'symmetric':
+        from scipy.linalg import eigh
+
+        lowest_vals, vecs = eigh(square_matrix, subset_by_index=[0, K - 1])
+        return lowest_vals, vecs.T
+
+    if matrix_format == 'banded':
+        from scipy.linalg import eig_banded, eigh_tridiagonal
+
+        if square_matrix.shape[0] == 2:
+            lowest_vals, vecs = eigh_tridiagonal(
+                square_matrix[1], square_matrix[0, 1:],
+                select='i', select_range=(0, K - 1)
+            )
+        else:
+            lowest_vals, vecs = eig_banded(
+                square_matrix, select='i', select_range=(0, K - 1)
+            )
+        return lowest_vals, vecs.T
+
+    if matrix_format == 'sparse':
+        from scipy.sparse.linalg import eigsh
+
+        if K >= M - 1:
+            # ARPACK needs K < M - 1; tiny problems are cheap to solve densely
+            return calculate_lowest_eigenvectors(
+                square_matrix.toarray(), K, matrix_format='symmetric'
+            )
+
+        # Shift below the Gershgorin lower bound so the lowest states converge first
+        diagonal = square_matrix.diagonal()
+        row_sums = np.asarray(abs(square_matrix).sum(axis=1)).ravel()
+        lower_bound = np.min(2 * diagonal - row_sums)
+        shift = lower_bound - 1.0 - 1e-6 * abs(lower_bound)
+
+        vals, vecs = eigsh(square_matrix.tocsc(), k=K, sigma=shift, which='LM')
+        selected = np.argsort(vals)
+        return vals[selected], vecs[:, selected].T
+
     vals, vecs = np.linalg.eig(square_matrix)
     selected = np.argsort(vals)[:K]
     lowest_vals = vals[selected]
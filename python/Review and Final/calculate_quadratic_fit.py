@@ -23,6 +23,70 @@ def calculate_quadratic_fit(data: np.ndarray, tol: float = 1e-12) -> np.ndarray:
     return coeffs
 
 
+def calculate_quadratic_fit_batch(data, tol: float = 1e-12) -> np.ndarray:
+    """
+    Batched calculate_quadratic_fit: accepts a (B, 2, M) array (NaN-padded if the
+    datasets differ in length) or a list of (2, M_i) arrays, M_i >= 3, and returns
+    (B, 3) coefficients (c0, c1, c2). All B least-squares problems are solved
+    together from power sums and 3x3 normal equations, with x and y centered
+    and x scaled to [-1, 1] first so the normal equations stay well conditioned.
+    """
+    if isinstance(data, np.ndarray) and data.ndim == 3:
+        if data.shape[1] != 2:
+            raise IndexError(
+                f"Change format to (B, 2, M) with M >= 3; got {data.shape}"
+            )
+        stacked = data.astype(float)
+    else:
+        datasets = [np.asarray(dataset, dtype=float) for dataset in data]
+        for dataset in datasets:
+            if dataset.ndim != 2 or dataset.shape[0] != 2:
+                raise IndexError(
+                    f"Change format to (2, M) with M >= 3; got {dataset.shape}"
+                )
+        longest = max((dataset.shape[1] for dataset in datasets), default=0)
+        stacked = np.full((len(datasets), 2, longest), np.nan)
+        for index, dataset in enumerate(datasets):
+            stacked[index, :, :dataset.shape[1]] = dataset
+
+    weights = np.all(np.isfinite(stacked), axis=1)
+    counts = weights.sum(axis=1)
+    if np.any(counts < 3):
+        raise IndexError(
+            f"Every dataset needs M >= 3 points; got {counts.min() if counts.size else 0}"
+        )
+    x = np.where(weights, stacked[:, 0], 0.)
+    y = np.where(weights, stacked[:, 1], 0.)
+
+    # Center and scale: t = (x - x_mean) / x_scale lies in [-1, 1]
+    x_mean = x.sum(axis=1) / counts
+    y_mean = y.sum(axis=1) / counts
+    x_scale = np.max(np.where(weights, np.abs(x - x_mean[:, None]), 0.), axis=1)
+    x_scale = np.where(x_scale > 0, x_scale, 1.)
+    t = np.where(weights, (x - x_mean[:, None]) / x_scale[:, None], 0.)
+    u = np.where(weights, y - y_mean[:, None], 0.)
+
+    t_squared = t * t
+    power_sums = np.stack([counts, t.sum(axis=1), t_squared.sum(axis=1),
+                           (t_squared * t).sum(axis=1), (t_squared * t_squared).sum(axis=1)], axis=1)
+    moments = np.stack([u.sum(axis=1), (u * t).sum(axis=1), (u * t_squared).sum(axis=1)], axis=1)
+
+    # Normal equations [S_{j+k}] a = [sum u t^j] for u = a0 + a1 t + a2 t^2
+    normal_matrix = power_sums[:, np.array([[0, 1, 2], [1, 2, 3], [2, 3, 4]])]
+    a0, a1, a2 = np.linalg.solve(normal_matrix, moments[..., None])[..., 0].T
+
+    # Undo the centering and scaling
+    c2 = a2 / x_scale ** 2
+    c1 = a1 / x_scale - 2 * c2 * x_mean
+    c0 = y_mean + a0 - a1 * x_mean / x_scale + c2 * x_mean ** 2
+    coeffs = np.stack([c0, c1, c2], axis=1)
+
+    small = np.isclose(coeffs, 0.0, atol=tol)
+    coeffs[small] = 0.0
+
+    return coeffs
+
+
 if __name__ == "__main__":
     # Tests over interval [-1, 1]
     x = np.linspace(-1, 1, 50)
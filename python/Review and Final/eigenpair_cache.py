@@ -0,0 +1,186 @@
+"""
+Caches the lowest eigenpairs of generate_matrix Hamiltonians in memory and on disk, keyed by
+a hash of the grid and the potential values on it, so replotting the same system skips the eigen-solve
+"""
+
+import os
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from generate_matrix import calculate_lowest_eigenvectors_numerov, evaluate_potential, generate_matrix
+from calculate_lowest_eigenvectors import calculate_lowest_eigenvectors
+
+# Next to this module, so scripts launched from any directory share one cache
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".eigenpair_cache")
+MEMORY_CACHE_BYTES = 256 * 2**20
+DISK_CACHE_BYTES = 2**30
+
+# key -> (energies, wavefunctions), least recently used first
+_memory_cache = OrderedDict()
+
+
+def eigenpair_key(minimum_x, maximum_x, number_of_dimensions, potential_name, potential_parameter, stencil=3):
+    """
+    Content hash identifying one Hamiltonian: grid endpoints, number of grid points, stencil
+    and the potential values on the grid, so re-registering a potential under the same name
+    never returns stale eigenpairs
+    :return: str :: hexadecimal SHA-256 digest
+    """
+    potential = evaluate_potential(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                   potential_parameter)
+    digest = hashlib.sha256(repr((float(minimum_x), float(maximum_x), int(number_of_dimensions),
+                                  str(stencil))).encode())
+    digest.update(np.ascontiguousarray(potential).tobytes())
+    return digest.hexdigest()
+
+
+def solve_lowest_eigenvectors(minimum_x, maximum_x, number_of_dimensions, potential_name, potential_parameter,
+                              number_of_eigenvectors=3, stencil=3):
+    """
+    Uncached solve: banded Hamiltonian and banded eigen-solver for the finite-difference
+    stencils, tridiagonal shift-inverted Lanczos for Numerov.
+    """
+    if stencil == "numerov":
+        return calculate_lowest_eigenvectors_numerov(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                                     potential_parameter, number_of_eigenvectors)
+
+    hamiltonian = generate_matrix(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                  potential_parameter, matrix_format="banded", stencil=stencil)
+    return calculate_lowest_eigenvectors(hamiltonian, number_of_eigenvectors, matrix_format="banded")
+
+
+def _remember(key, energies, wavefunctions, memory_bytes):
+    """
+    Stores an entry in the memory cache and evicts least recently used entries above memory_bytes.
+    """
+    energies.flags.writeable = False
+    wavefunctions.flags.writeable = False
+    _memory_cache[key] = (energies, wavefunctions)
+    _memory_cache.move_to_end(key)
+
+    total_bytes = sum(stored[0].nbytes + stored[1].nbytes for stored in _memory_cache.values())
+    while total_bytes > memory_bytes and len(_memory_cache) > 1:
+        _, (old_energies, old_wavefunctions) = _memory_cache.popitem(last=False)
+        total_bytes -= old_energies.nbytes + old_wavefunctions.nbytes
+
+
+def _evict_disk(cache_directory, disk_bytes):
+    """
+    Deletes the least recently used cache files until the directory fits in disk_bytes.
+    """
+    entries = []
+    for name in os.listdir(cache_directory):
+        if name.endswith(".npz"):
+            path = os.path.join(cache_directory, name)
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_bytes <= disk_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+
+
+def calculate_lowest_eigenvectors_cached(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                         potential_parameter, number_of_eigenvectors=3, stencil=3,
+                                         cache_directory=CACHE_DIRECTORY,
+                                         memory_bytes=MEMORY_CACHE_BYTES, disk_bytes=DISK_CACHE_BYTES):
+    """
+    Returns the lowest eigenvalues and eigenvectors of the generate_matrix Hamiltonian,
+    from the memory cache, then the disk cache, and only solving the banded problem if neither
+    holds at least number_of_eigenvectors pairs for this grid and potential
+    :param minimum_x:               float :: left endpoint of the spatial grid
+    :param maximum_x:               float :: right endpoint of the spatial grid
+    :param number_of_dimensions:    int :: N, number of grid points
+    :param potential_name:          str :: name of a potential registered in generate_matrix
+    :param potential_parameter:     float :: single parameter to adjust potential
+    :param number_of_eigenvectors:  int, optional :: K, number of lowest eigenpairs to return
+    :param stencil:                 int or str, optional :: second-derivative stencil passed to generate_matrix
+    :param cache_directory:         str or None, optional :: directory of the disk cache, None for memory only
+    :param memory_bytes:            int, optional :: size cap of the memory cache
+    :param disk_bytes:              int, optional :: size cap of the disk cache
+    :return:                        NumPy array(K) :: lowest eigenvalues (read-only),
+                                    NumPy array(K, N) :: matching eigenvectors as rows (read-only)
+    """
+    key = eigenpair_key(minimum_x, maximum_x, number_of_dimensions, potential_name, potential_parameter, stencil)
+
+    if key in _memory_cache:
+        energies, wavefunctions = _memory_cache[key]
+        if len(energies) >= number_of_eigenvectors:
+            _memory_cache.move_to_end(key)
+            return energies[:number_of_eigenvectors], wavefunctions[:number_of_eigenvectors]
+
+    cache_filename = None
+    if cache_directory is not None:
+        cache_filename = os.path.join(cache_directory, key + ".npz")
+        try:
+            with np.load(cache_filename) as stored:
+                energies, wavefunctions = stored["energies"], stored["wavefunctions"]
+        except (OSError, KeyError, ValueError):
+            # Not cached yet, or a partial/corrupt file that gets rewritten below
+            energies = np.empty(0)
+        else:
+            try:
+                os.utime(cache_filename)  # mark as recently used
+            except OSError:
+                pass
+        if len(energies) >= number_of_eigenvectors:
+            _remember(key, energies, wavefunctions, memory_bytes)
+            return energies[:number_of_eigenvectors], wavefunctions[:number_of_eigenvectors]
+
+    energies, wavefunctions = solve_lowest_eigenvectors(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                                        potential_parameter, number_of_eigenvectors, stencil)
+    _remember(key, energies, wavefunctions, memory_bytes)
+
+    if cache_filename is not None:
+        temporary_filename = None
+        try:
+            os.makedirs(cache_directory, exist_ok=True)
+            # Write then rename, so parallel workers never read a half-written file
+            file_descriptor, temporary_filename = tempfile.mkstemp(dir=cache_directory, suffix=".tmp")
+            with os.fdopen(file_descriptor, "wb") as temporary_file:
+                np.savez(temporary_file, energies=energies, wavefunctions=wavefunctions)
+            os.replace(temporary_filename, cache_filename)
+            _evict_disk(cache_directory, disk_bytes)
+        except OSError:
+            # Read-only or full disk, keep the eigenpairs in memory only
+            if temporary_filename is not None and os.path.exists(temporary_filename):
+                try:
+                    os.remove(temporary_filename)
+                except OSError:
+                    pass
+
+    return energies, wavefunctions
+
+
+def clear_eigenpair_cache(cache_directory=CACHE_DIRECTORY):
+    """
+    Empties the memory cache and deletes every file of the disk cache.
+    """
+    _memory_cache.clear()
+    if cache_directory is not None and os.path.isdir(cache_directory):
+        _evict_disk(cache_directory, 0)
+
+
+if __name__ == "__main__":
+    import time
+
+    for attempt in ["solve", "memory"]:
+        start = time.perf_counter()
+        values, vectors = calculate_lowest_eigenvectors_cached(-10., 10., 100_000, "harmonic", 1.0, 5)
+        print(f"{attempt:>6}: {time.perf_counter() - start:.4f} s, E = {values}")
+    _memory_cache.clear()
+    start = time.perf_counter()
+    calculate_lowest_eigenvectors_cached(-10., 10., 100_000, "harmonic", 1.0, 5)
+    print(f"{'disk':>6}: {time.perf_counter() - start:.4f} s")
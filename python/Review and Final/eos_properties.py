@@ -0,0 +1,216 @@
+"""
+Evaluates pressure P(V), bulk modulus K(V), its pressure derivative K'(V) and enthalpy H(P) of the
+fit_eos equations of state analytically, and inverts P(V) to V(P) with a vectorized Newton iteration,
+so pressure-volume tables for many fitted materials need no finite differences of E(V)
+"""
+
+import sys
+import numpy as np
+
+from fit_eos import EQUATIONS_OF_STATE
+
+
+def murnaghan_properties(volumes, equilibrium_energy, bulk_modulus, bulk_modulus_derivative, equilibrium_volume):
+    """
+    Murnaghan equation of state: P(V) = (K_0 / K_0') [ (V / V_0)^(-K_0') - 1 ]
+                                 K(V) = K_0 (V / V_0)^(-K_0')
+                                 K'(V) = K_0'
+
+    :return: NumPy arrays of P, K and K' at input volumes
+    """
+    reduced_bulk_modulus = np.power(volumes / equilibrium_volume, -bulk_modulus_derivative)
+    pressures = bulk_modulus / bulk_modulus_derivative * (reduced_bulk_modulus - 1.)
+    bulk_moduli = bulk_modulus * reduced_bulk_modulus
+    return pressures, bulk_moduli, np.broadcast_to(bulk_modulus_derivative, np.shape(bulk_moduli)).astype(float)
+
+
+def birch_murnaghan_properties(volumes, equilibrium_energy, bulk_modulus, bulk_modulus_derivative,
+                               equilibrium_volume):
+    """
+    Birch-Murnaghan equation of state, with eta = (V / V_0)^(-2/3):
+        P(V) = (3 K_0 / 2) (eta^(7/2) - eta^(5/2)) [1 + (3/4) (K_0' - 4) (eta - 1)]
+        K(V) = -V dP/dV = (2/3) eta dP/deta
+        K'(V) = dK/dP = (dK/deta) / (dP/deta)
+
+    :return: NumPy arrays of P, K and K' at input volumes
+    """
+    eta = np.power(volumes / equilibrium_volume, -2. / 3.)
+    correction_slope = 0.75 * (bulk_modulus_derivative - 4.)
+    correction = 1. + correction_slope * (eta - 1.)
+
+    # strain = eta^(7/2) - eta^(5/2) and its first two eta-derivatives
+    strain = np.power(eta, 3.5) - np.power(eta, 2.5)
+    strain_slope = 3.5 * np.power(eta, 2.5) - 2.5 * np.power(eta, 1.5)
+    strain_curvature = 8.75 * np.power(eta, 1.5) - 3.75 * np.sqrt(eta)
+
+    pressures = 1.5 * bulk_modulus * strain * correction
+    pressure_slope = 1.5 * bulk_modulus * (strain_slope * correction + strain * correction_slope)
+    pressure_curvature = 1.5 * bulk_modulus * (strain_curvature * correction + 2. * strain_slope * correction_slope)
+
+    bulk_moduli = (2. / 3.) * eta * pressure_slope
+    bulk_moduli_derivatives = (2. / 3.) * (pressure_slope + eta * pressure_curvature) / pressure_slope
+    return pressures, bulk_moduli, bulk_moduli_derivatives
+
+
+def vinet_properties(volumes, equilibrium_energy, bulk_modulus, bulk_modulus_derivative, equilibrium_volume):
+    """
+    Vinet equation of state, with x = (V / V_0)^(1/3) and eta = (3/2) (K_0' - 1):
+        P(V) = 3 K_0 (1 - x) x^(-2) exp(eta (1 - x))
+        K(V) = K_0 x^(-2) exp(eta (1 - x)) [2 - x + eta x (1 - x)]
+        K'(V) = [2 + eta x - x (eta - 1 - 2 eta x) / (2 - x + eta x (1 - x))] / 3
+
+    :return: NumPy arrays of P, K and K' at input volumes
+    """
+    reduced_volume_lengths = np.cbrt(volumes / equilibrium_volume)
+    eta = 1.5 * (bulk_modulus_derivative - 1.)
+    scale = bulk_modulus * np.exp(eta * (1. - reduced_volume_lengths)) / np.power(reduced_volume_lengths, 2)
+    stiffness = 2. - reduced_volume_lengths + eta * reduced_volume_lengths * (1. - reduced_volume_lengths)
+    stiffness_slope = eta - 1. - 2. * eta * reduced_volume_lengths
+
+    pressures = 3. * scale * (1. - reduced_volume_lengths)
+    bulk_moduli = scale * stiffness
+    bulk_moduli_derivatives = (2. + eta * reduced_volume_lengths -
+                               reduced_volume_lengths * stiffness_slope / stiffness) / 3.
+    return pressures, bulk_moduli, bulk_moduli_derivatives
+
+
+# Analytic (P, K, K') of each equation of state in fit_eos.EQUATIONS_OF_STATE
+EQUATION_OF_STATE_PROPERTIES = {
+    'vinet': vinet_properties,
+    'murnaghan': murnaghan_properties,
+    'birch-murnaghan': birch_murnaghan_properties,
+}
+
+
+def calculate_eos_properties(volumes, equation_parameters, equation_of_state='vinet'):
+    """
+    Pressure, bulk modulus and bulk modulus pressure derivative on a volume grid
+    :param volumes:                 NumPy array(..., N) :: volumes to evaluate at
+    :param equation_parameters:     NumPy array(..., 4) :: (E_0, K_0, K_0', V_0) of one or many fits,
+                                    broadcast against the leading axes of volumes
+    :param equation_of_state:       str :: equation of state name ('murnaghan', 'birch-murnaghan', 'vinet')
+    :return:                        NumPy array(..., N) :: P, NumPy array(..., N) :: K, NumPy array(..., N) :: K'
+    """
+    properties = EQUATION_OF_STATE_PROPERTIES[equation_of_state.lower()]
+    equation_parameters = np.asarray(equation_parameters, dtype=float)
+    with np.errstate(all='ignore'):
+        return properties(np.asarray(volumes, dtype=float), *np.moveaxis(equation_parameters, -1, 0)[..., None])
+
+
+def volume_from_pressure(pressures, equation_parameters, equation_of_state='vinet', tolerance=1e-12,
+                         maximum_iterations=50):
+    """
+    Inverts P(V) with a vectorized Newton iteration on ln V, using dP/d(ln V) = -K(V) and the
+    closed-form Murnaghan inverse V = V_0 (1 + K_0' P / K_0)^(-1 / K_0') as starting guess
+    :param pressures:               NumPy array(..., N) :: pressures to find volumes for
+    :param equation_parameters:     NumPy array(..., 4) :: (E_0, K_0, K_0', V_0) of one or many fits
+    :param equation_of_state:       str :: equation of state name ('murnaghan', 'birch-murnaghan', 'vinet')
+    :param tolerance:               float, optional :: convergence threshold on the relative volume change
+    :param maximum_iterations:      int, optional :: Newton iteration limit
+    :return:                        NumPy array(..., N) :: volumes, NaN where the pressure is out of reach
+                                    (e.g. tensions beyond the spinodal, where K(V) <= 0)
+    """
+    pressures = np.asarray(pressures, dtype=float)
+    equation_parameters = np.asarray(equation_parameters, dtype=float)
+    _, bulk_modulus, bulk_modulus_derivative, equilibrium_volume = np.moveaxis(equation_parameters, -1, 0)[..., None]
+
+    with np.errstate(all='ignore'):
+        log_volumes = np.log(equilibrium_volume) - np.log1p(bulk_modulus_derivative * pressures / bulk_modulus) / \
+                      bulk_modulus_derivative
+        log_volumes = np.where(np.isfinite(log_volumes), log_volumes, np.log(equilibrium_volume))
+        log_volumes, pressures = np.broadcast_arrays(log_volumes, pressures)
+        if equation_of_state.lower() == 'murnaghan':
+            return np.where(bulk_modulus_derivative * pressures / bulk_modulus > -1., np.exp(log_volumes), np.nan)
+
+        # Start on the stable branch (K > 0), from V_0 where the Murnaghan guess overshoots it
+        _, bulk_moduli, _ = calculate_eos_properties(np.exp(log_volumes), equation_parameters, equation_of_state)
+        log_volumes = np.where(bulk_moduli > 0, log_volumes, np.log(equilibrium_volume))
+
+        converged = np.zeros(log_volumes.shape, dtype=bool)
+        for _ in range(maximum_iterations):
+            model_pressures, bulk_moduli, _ = calculate_eos_properties(np.exp(log_volumes), equation_parameters,
+                                                                       equation_of_state)
+            newton_step = (model_pressures - pressures) / bulk_moduli
+            converged |= np.abs(newton_step) <= tolerance
+            active = ~converged & np.isfinite(newton_step)
+            if not np.any(active):
+                break
+
+            # Damped step, halved while it would leave the stable branch: pressures beyond the
+            # spinodal then creep towards it without ever converging
+            step = np.where(active, np.clip(newton_step, -0.5, 0.5), 0.)
+            for _ in range(60):
+                _, trial_bulk_moduli, _ = calculate_eos_properties(np.exp(log_volumes + step), equation_parameters,
+                                                                   equation_of_state)
+                unstable = ~(trial_bulk_moduli > 0) & active
+                if not np.any(unstable):
+                    break
+                step = np.where(unstable, 0.5 * step, step)
+            log_volumes += step
+
+        return np.where(converged, np.exp(log_volumes), np.nan)
+
+
+def calculate_enthalpy(pressures, equation_parameters, equation_of_state='vinet'):
+    """
+    Enthalpy H(P) = E(V(P)) + P V(P)
+    :param pressures:               NumPy array(..., N) :: pressures to evaluate at
+    :param equation_parameters:     NumPy array(..., 4) :: (E_0, K_0, K_0', V_0) of one or many fits
+    :param equation_of_state:       str :: equation of state name ('murnaghan', 'birch-murnaghan', 'vinet')
+    :return:                        NumPy array(..., N) :: enthalpies, NumPy array(..., N) :: volumes V(P)
+    """
+    volumes = volume_from_pressure(pressures, equation_parameters, equation_of_state)
+    equation_parameters = np.asarray(equation_parameters, dtype=float)
+    energies = EQUATIONS_OF_STATE[equation_of_state.lower()](
+        volumes, *np.moveaxis(equation_parameters, -1, 0)[..., None])
+    return energies + np.asarray(pressures) * volumes, volumes
+
+
+def pressure_volume_table(pressures, equation_parameters, equation_of_state='vinet'):
+    """
+    Tabulates V, H, K and K' at every pressure for every fitted material
+    :param pressures:               NumPy array(N) :: pressures of the table
+    :param equation_parameters:     NumPy array(B, 4) :: (E_0, K_0, K_0', V_0) of B fits
+    :param equation_of_state:       str :: equation of state name ('murnaghan', 'birch-murnaghan', 'vinet')
+    :return:                        NumPy structured array(B, N) :: fields pressure, volume, enthalpy,
+                                    bulk_modulus, bulk_modulus_derivative
+    """
+    equation_parameters = np.atleast_2d(np.asarray(equation_parameters, dtype=float))
+    pressures = np.asarray(pressures, dtype=float)
+    enthalpies, volumes = calculate_enthalpy(pressures, equation_parameters, equation_of_state)
+    _, bulk_moduli, bulk_moduli_derivatives = calculate_eos_properties(volumes, equation_parameters,
+                                                                       equation_of_state)
+
+    table = np.zeros(volumes.shape, dtype=[
+        ('pressure', float),
+        ('volume', float),
+        ('enthalpy', float),
+        ('bulk_modulus', float),
+        ('bulk_modulus_derivative', float),
+    ])
+    table['pressure'] = pressures
+    table['volume'] = volumes
+    table['enthalpy'] = enthalpies
+    table['bulk_modulus'] = bulk_moduli
+    table['bulk_modulus_derivative'] = bulk_moduli_derivatives
+    return table
+
+
+if __name__ == "__main__":
+    import time
+
+    # Si-like fit in rydberg and bohr^3: E_0, K_0, K_0', V_0
+    parameters = np.array([-15.85, 0.0064, 4.16, 265.9])
+    table_pressures = np.linspace(0., 0.01, 6)
+    for equation_name in EQUATION_OF_STATE_PROPERTIES:
+        print(equation_name)
+        for row in pressure_volume_table(table_pressures, parameters, equation_name)[0]:
+            print(f"  P = {row['pressure']:.4f}  V = {row['volume']:9.4f}  H = {row['enthalpy']:10.5f}  "
+                  f"K = {row['bulk_modulus']:.5f}  K' = {row['bulk_modulus_derivative']:.3f}")
+
+    number_of_materials = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    random_generator = np.random.default_rng(0)
+    many_parameters = parameters * random_generator.uniform(0.8, 1.2, (number_of_materials, 4))
+    start = time.perf_counter()
+    pressure_volume_table(np.linspace(0., 0.01, 100), many_parameters, 'vinet')
+    print(f"{number_of_materials} materials x 100 pressures: {time.perf_counter() - start:.3f} s")
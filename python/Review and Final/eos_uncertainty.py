@@ -0,0 +1,146 @@
+"""
+Estimates uncertainties of fitted equation of state parameters by refitting bootstrap and jackknife
+resamples of the energy-volume data, all resamples at once with fit_eos.fit_equation_of_state_batch
+"""
+
+import sys
+import numpy as np
+
+from calculate_quadratic_fit import calculate_quadratic_fit
+from fit_eos import fit_equation_of_state_batch
+
+# Column of each parameter in the (E_0, K_0, K_0', V_0) arrays returned below
+PARAMETER_INDICES = {'E0': 0, 'K0': 1, 'K0_derivative': 2, 'V0': 3}
+
+
+def fit_resamples(volumes, energies, resample_indices, quadratic_coefficients, equation_of_state, batch_size):
+    """
+    Fits every row of resample_indices (R, M) as one dataset, batch_size rows per vectorized fit,
+    every fit seeded with the same quadratic coefficients
+    :return: NumPy array(R, 4) :: fitted (E_0, K_0, K_0', V_0) of each resample
+    """
+    samples = np.empty((len(resample_indices), 4))
+    for start in range(0, len(resample_indices), batch_size):
+        rows = resample_indices[start:start + batch_size]
+        samples[start:start + batch_size], _ = fit_equation_of_state_batch(
+            volumes[rows], energies[rows], np.broadcast_to(quadratic_coefficients, (len(rows), 3)),
+            equation_of_state=equation_of_state)
+    return samples
+
+
+def bootstrap_equation_of_state(volumes, energies, equation_of_state='murnaghan', number_of_resamples=2000,
+                                confidence_level=0.95, seed=0, batch_size=1000):
+    """
+    Bootstrap uncertainty of an equation of state fit: refits number_of_resamples datasets drawn with
+    replacement from the data and reports percentile confidence intervals
+    :param volumes:                 NumPy array(M) :: volumes (x-values) to be fit
+    :param energies:                NumPy array(M) :: energies (y-values) to be fit
+    :param equation_of_state:       str :: equation of state name ('murnaghan', 'birch-murnaghan', 'vinet')
+    :param number_of_resamples:     int, optional :: R, number of bootstrap datasets
+    :param confidence_level:        float, optional :: coverage of the confidence intervals
+    :param seed:                    int, optional :: seed of the random resampling
+    :param batch_size:              int, optional :: number of resamples per vectorized fit
+    :return:                        dict :: 'parameters' NumPy array(4) fitted to all data,
+                                    'samples' NumPy array(R, 4) of resample fits (NaN for resamples with
+                                    fewer than 4 distinct volumes), 'standard_errors' NumPy array(4),
+                                    'confidence_intervals' NumPy array(2, 4) of lower and upper bounds
+    """
+    volumes = np.asarray(volumes, dtype=float)
+    energies = np.asarray(energies, dtype=float)
+    quadratic_coefficients = calculate_quadratic_fit(np.vstack([volumes, energies]))
+    parameters, _ = fit_equation_of_state_batch(volumes, energies, quadratic_coefficients[None],
+                                                equation_of_state=equation_of_state)
+
+    random_generator = np.random.default_rng(seed)
+    resample_indices = np.sort(random_generator.integers(0, len(volumes), (number_of_resamples, len(volumes))),
+                               axis=1)
+    samples = fit_resamples(volumes, energies, resample_indices, quadratic_coefficients, equation_of_state,
+                            batch_size)
+    # Four parameters cannot be determined from fewer than four distinct volumes
+    distinct_volumes = 1 + np.count_nonzero(np.diff(resample_indices, axis=1), axis=1)
+    samples[distinct_volumes < 4] = np.nan
+
+    tail = 50. * (1. - confidence_level)
+    return {
+        'parameters': parameters[0],
+        'samples': samples,
+        'standard_errors': np.nanstd(samples, axis=0, ddof=1),
+        'confidence_intervals': np.nanpercentile(samples, [tail, 100. - tail], axis=0),
+    }
+
+
+def jackknife_equation_of_state(volumes, energies, equation_of_state='murnaghan', confidence_level=0.95):
+    """
+    Jackknife uncertainty of an equation of state fit: refits the M leave-one-out datasets and reports
+    Student-t confidence intervals around the bias-corrected estimate
+    :param volumes:                 NumPy array(M) :: volumes (x-values) to be fit, M >= 5
+    :param energies:                NumPy array(M) :: energies (y-values) to be fit
+    :param equation_of_state:       str :: equation of state name ('murnaghan', 'birch-murnaghan', 'vinet')
+    :param confidence_level:        float, optional :: coverage of the confidence intervals
+    :return:                        dict :: 'parameters' NumPy array(4) fitted to all data,
+                                    'samples' NumPy array(M, 4) of leave-one-out fits,
+                                    'standard_errors' NumPy array(4),
+                                    'confidence_intervals' NumPy array(2, 4) of lower and upper bounds
+    """
+    from scipy.stats import t as student_t
+
+    volumes = np.asarray(volumes, dtype=float)
+    energies = np.asarray(energies, dtype=float)
+    number_of_points = len(volumes)
+    if number_of_points < 5:
+        raise IndexError(f"The jackknife needs at least 5 points to leave one out of; got {number_of_points}")
+
+    quadratic_coefficients = calculate_quadratic_fit(np.vstack([volumes, energies]))
+    parameters, _ = fit_equation_of_state_batch(volumes, energies, quadratic_coefficients[None],
+                                                equation_of_state=equation_of_state)
+
+    # Row i holds every index except i
+    leave_one_out = np.arange(1, number_of_points) - np.tri(number_of_points, number_of_points - 1, -1, dtype=int)
+    samples = fit_resamples(volumes, energies, leave_one_out, quadratic_coefficients, equation_of_state,
+                            number_of_points)
+
+    sample_mean = np.mean(samples, axis=0)
+    standard_errors = np.sqrt((number_of_points - 1) / number_of_points *
+                              np.sum((samples - sample_mean) ** 2, axis=0))
+    bias_corrected = number_of_points * parameters[0] - (number_of_points - 1) * sample_mean
+    half_width = student_t.ppf(0.5 + 0.5 * confidence_level, number_of_points - 1) * standard_errors
+    return {
+        'parameters': parameters[0],
+        'samples': samples,
+        'standard_errors': standard_errors,
+        'confidence_intervals': np.stack([bias_corrected - half_width, bias_corrected + half_width]),
+    }
+
+
+# Uncertainty method name -> function(volumes, energies, equation_of_state)
+UNCERTAINTY_METHODS = {
+    'bootstrap': bootstrap_equation_of_state,
+    'jackknife': jackknife_equation_of_state,
+}
+
+
+if __name__ == "__main__":
+    import time
+
+    from fit_eos import murnaghan
+
+    # Noisy Murnaghan data in rydberg and bohr^3, or a two-column file given on the command line
+    if len(sys.argv) > 1:
+        from read_two_columns_text import read_two_columns_text
+
+        data_volumes, data_energies = read_two_columns_text(sys.argv[1])
+    else:
+        data_volumes = np.linspace(220., 320., 15)
+        data_energies = murnaghan(data_volumes, -15.85, 0.0064, 4.16, 265.9)
+        data_energies += np.random.default_rng(1).normal(0., 2e-5, len(data_volumes))
+
+    for method_name, method in UNCERTAINTY_METHODS.items():
+        start = time.perf_counter()
+        uncertainty = method(data_volumes, data_energies)
+        elapsed = time.perf_counter() - start
+        print(f"{method_name} ({len(uncertainty['samples'])} refits, {elapsed:.3f} s)")
+        for parameter_name in ('V0', 'K0'):
+            index = PARAMETER_INDICES[parameter_name]
+            lower, upper = uncertainty['confidence_intervals'][:, index]
+            print(f"  {parameter_name} = {uncertainty['parameters'][index]:.6g} "
+                  f"± {uncertainty['standard_errors'][index]:.2g}   95% CI [{lower:.6g}, {upper:.6g}]")
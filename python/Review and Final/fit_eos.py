@@ -7,6 +7,8 @@ __author__ = 'Ryan Glusic and William Parker'
 
 import numpy as np
 
+from calculate_quadratic_fit import calculate_quadratic_fit_batch
+
 
 def fit_equation_of_state(volumes, energies, quadratic_coefficients, equation_of_state='vinet', number_of_points=50):
     """
@@ -22,45 +24,143 @@ def fit_equation_of_state(volumes, energies, quadratic_coefficients, equation_of
     """
     from scipy.optimize import curve_fit
 
-    # Dictionary holding lambda functions from current module.
-    lambda_dictionary = {
-        'vinet': globals()['vinet'],
-        'murnaghan': globals()['murnaghan'],
-        'birch-murnaghan': globals()['birch_murnaghan']
-    }
+    equation = EQUATIONS_OF_STATE[equation_of_state.lower()]
+    jacobian = EQUATION_OF_STATE_JACOBIANS[equation_of_state.lower()]
 
     # Get extremes of data and calculate range
 
     minimum_volume = np.amin(volumes)
     maximum_volume = np.amax(volumes)
 
-    # for y = c0 + c1 x + c2 x^2
-    #   axis of symmetry: x = -c1 / (2 c2)
-    quadratic_axis_of_symmetry = -quadratic_coefficients[1] / (2 * quadratic_coefficients[2])
-    #   minimum: y = -c1^2 / (4 c2)  + c0
-    quadratic_minimum = -quadratic_coefficients[1] ** 2 / (4 * quadratic_coefficients[2]) + quadratic_coefficients[0]
-    #   bulk modulus: K_0 = 2 * a / V_0 for E(V) = c2*V^2 + c1*V + E0
-    quadratic_bulk_modulus = 2. * quadratic_coefficients[2] / quadratic_axis_of_symmetry
-
-    bulk_modulus_derivative = 3.7
-
     # Get realistic equation of state fit
 
-    initial_parameters = [quadratic_minimum, quadratic_bulk_modulus,
-                          bulk_modulus_derivative, quadratic_axis_of_symmetry]
+    initial_parameters = initial_parameters_from_quadratic(np.asarray(quadratic_coefficients, dtype=float))
 
-    equation_parameters, equation_covariances = curve_fit(lambda_dictionary[equation_of_state.lower()], volumes, energies,
-                                                p0=initial_parameters, method='trf')  # ,
+    equation_parameters, equation_covariances = curve_fit(equation, volumes, energies,
+                                                p0=initial_parameters, jac=jacobian, method='trf')  # ,
     # x_scale=[10**np.floor(np.log10(np.amin(np.abs(energies)))), 100, 1,
     #         10**np.floor(np.log10(np.amin(np.abs(volumes))))])
     fit_curve_volumes = np.linspace(minimum_volume, maximum_volume, num=number_of_points)
-    equation_fit_curve = lambda_dictionary[equation_of_state.lower()](fit_curve_volumes,
-                                                                 equation_parameters[0], equation_parameters[1], equation_parameters[2],
-                                                                 equation_parameters[3])
+    equation_fit_curve = equation(fit_curve_volumes,
+                                  equation_parameters[0], equation_parameters[1], equation_parameters[2],
+                                  equation_parameters[3])
 
     return equation_fit_curve, equation_parameters
 
 
+def initial_parameters_from_quadratic(quadratic_coefficients, bulk_modulus_derivative=3.7):
+    """
+    Returns starting parameters for an equation of state fit from quadratic fit coefficients
+    :param quadratic_coefficients:  NumPy array(..., 3) :: coefficients (c0, c1, c2) of quadratic fits to the data
+    :param bulk_modulus_derivative: float, optional :: starting guess for K_0'
+    :return:                        NumPy array(..., 4) :: starting (E_0, K_0, K_0', V_0) for each quadratic
+    """
+    c0, c1, c2 = quadratic_coefficients[..., 0], quadratic_coefficients[..., 1], quadratic_coefficients[..., 2]
+
+    # for y = c0 + c1 x + c2 x^2
+    #   axis of symmetry: x = -c1 / (2 c2)
+    quadratic_axis_of_symmetry = -c1 / (2 * c2)
+    #   minimum: y = -c1^2 / (4 c2)  + c0
+    quadratic_minimum = -c1 ** 2 / (4 * c2) + c0
+    #   bulk modulus: K_0 = V_0 * d^2E/dV^2 = 2 * c2 * V_0 for E(V) = c2*V^2 + c1*V + E0
+    quadratic_bulk_modulus = 2. * c2 * quadratic_axis_of_symmetry
+
+    return np.stack([quadratic_minimum, quadratic_bulk_modulus,
+                     np.full_like(quadratic_minimum, bulk_modulus_derivative),
+                     quadratic_axis_of_symmetry], axis=-1)
+
+
+def fit_equation_of_state_batch(volumes, energies, quadratic_coefficients=None, equation_of_state='vinet',
+                                maximum_iterations=200, tolerance=1e-12):
+    """
+    Fits an equation of state to a stack of energy-volume datasets at once with a vectorized
+    Levenberg-Marquardt iteration using the analytic Jacobian of the equation of state
+    :param volumes:                 NumPy array(B, N) :: volumes (x-values) of each dataset, NaN-padded if ragged
+    :param energies:                NumPy array(B, N) :: energies (y-values) of each dataset, NaN-padded if ragged
+    :param quadratic_coefficients:  NumPy array(B, 3), optional :: quadratic fit coefficients used as starting
+                                    guesses; fitted from the data if not given
+    :param equation_of_state:       str :: equation of state name ('murnaghan', 'birch-murnaghan', 'vinet')
+    :param maximum_iterations:      int, optional :: maximum number of Levenberg-Marquardt iterations
+    :param tolerance:               float, optional :: relative change in parameters or residual at convergence
+    :return:                        NumPy array(B, 4) :: fitted (E_0, K_0, K_0', V_0) for each dataset,
+                                    NumPy array(B, 4, 4) :: covariances of the fitted parameters
+    """
+    equation = EQUATIONS_OF_STATE[equation_of_state.lower()]
+    jacobian = EQUATION_OF_STATE_JACOBIANS[equation_of_state.lower()]
+
+    volumes = np.atleast_2d(np.asarray(volumes, dtype=float))
+    energies = np.atleast_2d(np.asarray(energies, dtype=float))
+    if volumes.shape != energies.shape or volumes.ndim != 2:
+        raise IndexError(f"volumes and energies must both be shape (B, N); got {volumes.shape} and {energies.shape}")
+
+    # Padding entries get zero weight and a harmless volume
+    weights = np.isfinite(volumes) & np.isfinite(energies)
+    number_of_data = weights.sum(axis=1)
+    if np.any(number_of_data < 4):
+        raise IndexError("Every dataset needs at least 4 points to fit an equation of state")
+    volumes = np.where(weights, volumes, np.nanmean(volumes, axis=1, keepdims=True))
+    energies = np.where(weights, energies, 0.)
+
+    if quadratic_coefficients is None:
+        quadratic_coefficients = calculate_quadratic_fit_batch(
+            np.stack([np.where(weights, volumes, np.nan), energies], axis=1))
+    parameters = initial_parameters_from_quadratic(np.asarray(quadratic_coefficients, dtype=float))
+
+    def residuals_and_squares(trial_parameters, rows):
+        residuals = np.where(weights[rows], equation(volumes[rows], *trial_parameters.T[..., None]) - energies[rows], 0.)
+        return residuals, np.sum(residuals ** 2, axis=1)
+
+    with np.errstate(all='ignore'):
+        all_rows = np.arange(len(volumes))
+        residuals, sum_of_squares = residuals_and_squares(parameters, all_rows)
+        damping = np.full(len(volumes), 1e-3)
+        active = np.isfinite(sum_of_squares)
+
+        for _ in range(maximum_iterations):
+            rows = np.flatnonzero(active)
+            if len(rows) == 0:
+                break
+
+            jacobian_matrix = jacobian(volumes[rows], *parameters[rows].T[..., None]) * weights[rows][..., None]
+            normal_matrix = np.einsum('bni,bnj->bij', jacobian_matrix, jacobian_matrix)
+            gradient = np.einsum('bni,bn->bi', jacobian_matrix, residuals[rows])
+
+            # Column scaling keeps E_0 ~ 10^3 and K_0 ~ 10^-2 on an equal footing
+            column_scale = np.sqrt(np.diagonal(normal_matrix, axis1=1, axis2=2))
+            column_scale = np.where(column_scale > 0, column_scale, 1.)
+            scaled_matrix = normal_matrix / (column_scale[:, :, None] * column_scale[:, None, :])
+            scaled_matrix += damping[rows, None, None] * np.eye(4)
+            # Datasets whose model went non-finite take no step and stop iterating
+            finite = np.all(np.isfinite(scaled_matrix), axis=(1, 2)) & np.all(np.isfinite(gradient), axis=1)
+            scaled_matrix[~finite] = np.eye(4)
+            gradient[~finite] = 0.
+            step = -np.linalg.solve(scaled_matrix, (gradient / column_scale)[..., None])[..., 0] / column_scale
+
+            trial_parameters = parameters[rows] + step
+            trial_residuals, trial_sum_of_squares = residuals_and_squares(trial_parameters, rows)
+            improved = trial_sum_of_squares <= sum_of_squares[rows]
+
+            accepted = rows[improved]
+            parameters[accepted] = trial_parameters[improved]
+            residuals[accepted] = trial_residuals[improved]
+            converged = improved & (
+                (sum_of_squares[rows] - trial_sum_of_squares <= tolerance * sum_of_squares[rows]) |
+                np.all(np.abs(step) <= tolerance * (np.abs(trial_parameters) + tolerance), axis=1))
+            sum_of_squares[accepted] = trial_sum_of_squares[improved]
+            damping[rows] = np.where(improved, damping[rows] / 10., damping[rows] * 10.)
+
+            active[rows[converged | ~finite | ~(damping[rows] < 1e16)]] = False
+
+        # Covariances as scipy.optimize.curve_fit reports them for unit weights
+        jacobian_matrix = jacobian(volumes, *parameters.T[..., None]) * weights[..., None]
+        normal_matrix = np.einsum('bni,bnj->bij', jacobian_matrix, jacobian_matrix)
+        degrees_of_freedom = number_of_data - 4
+        residual_variance = np.where(degrees_of_freedom > 0, sum_of_squares / np.maximum(degrees_of_freedom, 1), np.inf)
+        equation_covariances = np.linalg.pinv(normal_matrix, hermitian=True) * residual_variance[:, None, None]
+
+    return parameters, equation_covariances
+
+
 def murnaghan(volumes, equilibrium_energy, bulk_modulus, bulk_modulus_derivative, equilibrium_volume):
     """
     Murnaghan equation of state: E(V) = E_0 + K_0 V_0 [ (1 / (K_0' (K_0' - 1))) (V / V_0)^(-(K_0' - 1)) +
@@ -149,6 +249,82 @@ def vinet(volumes, equilibrium_energy, bulk_modulus, bulk_modulus_derivative, eq
     return vinet_eos
 
 
+def murnaghan_jacobian(volumes, equilibrium_energy, bulk_modulus, bulk_modulus_derivative, equilibrium_volume):
+    """
+    Analytic partial derivatives of the Murnaghan equation of state with respect to (E_0, K_0, K_0', V_0)
+
+    :return: NumPy array(..., N, 4) of ∂E/∂E_0, ∂E/∂K_0, ∂E/∂K_0', ∂E/∂V_0 at input volumes
+    """
+    k0pm1 = bulk_modulus_derivative - 1.0  # K_0' - 1
+    reduced_volumes = volumes / equilibrium_volume
+    power_term = np.power(reduced_volumes, -k0pm1)
+    bracket = (power_term / (bulk_modulus_derivative * k0pm1) + reduced_volumes / bulk_modulus_derivative -
+               1.0 / k0pm1)
+
+    d_energy = np.ones_like(power_term)
+    d_bulk_modulus = equilibrium_volume * bracket
+    d_bulk_modulus_derivative = bulk_modulus * equilibrium_volume * (
+            power_term / (bulk_modulus_derivative * k0pm1) *
+            (-np.log(reduced_volumes) - 1.0 / bulk_modulus_derivative - 1.0 / k0pm1) -
+            reduced_volumes / bulk_modulus_derivative ** 2 + 1.0 / k0pm1 ** 2)
+    d_volume = bulk_modulus / k0pm1 * (power_term - 1.0)
+    return np.stack(np.broadcast_arrays(d_energy, d_bulk_modulus, d_bulk_modulus_derivative, d_volume), axis=-1)
+
+
+def birch_murnaghan_jacobian(volumes, equilibrium_energy, bulk_modulus, bulk_modulus_derivative, equilibrium_volume):
+    """
+    Analytic partial derivatives of the Birch-Murnaghan equation of state with respect to (E_0, K_0, K_0', V_0)
+
+    :return: NumPy array(..., N, 4) of ∂E/∂E_0, ∂E/∂K_0, ∂E/∂K_0', ∂E/∂V_0 at input volumes
+    """
+    reduced_volume_area = np.power(volumes / equilibrium_volume, -2. / 3.)
+    strain = reduced_volume_area - 1.
+    bracket = np.power(strain, 3.) * bulk_modulus_derivative + np.power(strain, 2.) * (6. - 4. * reduced_volume_area)
+    bracket_derivative = (3. * bulk_modulus_derivative * np.power(strain, 2.) +
+                          2. * strain * (6. - 4. * reduced_volume_area) - 4. * np.power(strain, 2.))
+
+    d_energy = np.ones_like(reduced_volume_area)
+    d_bulk_modulus = (9. * equilibrium_volume / 16.) * bracket
+    d_bulk_modulus_derivative = (9. * bulk_modulus * equilibrium_volume / 16.) * np.power(strain, 3.)
+    d_volume = (9. * bulk_modulus / 16.) * (bracket + (2. / 3.) * reduced_volume_area * bracket_derivative)
+    return np.stack(np.broadcast_arrays(d_energy, d_bulk_modulus, d_bulk_modulus_derivative, d_volume), axis=-1)
+
+
+def vinet_jacobian(volumes, equilibrium_energy, bulk_modulus, bulk_modulus_derivative, equilibrium_volume):
+    """
+    Analytic partial derivatives of the Vinet equation of state with respect to (E_0, K_0, K_0', V_0)
+
+    :return: NumPy array(..., N, 4) of ∂E/∂E_0, ∂E/∂K_0, ∂E/∂K_0', ∂E/∂V_0 at input volumes
+    """
+    k0pm1 = bulk_modulus_derivative - 1  # K_0' - 1
+    reduced_volume_lengths = np.cbrt(volumes / equilibrium_volume)
+    length_strain = reduced_volume_lengths - 1.
+    exponential_factor = np.exp(-1.5 * k0pm1 * length_strain)
+    # E(V) = E_0 + (2 K_0 V_0 / (K_0' - 1)^2) * bracket
+    bracket = 2. - (2. + 3. * k0pm1 * length_strain) * exponential_factor
+
+    d_energy = np.ones_like(reduced_volume_lengths)
+    d_bulk_modulus = 2. * equilibrium_volume * bracket / k0pm1 ** 2
+    d_bulk_modulus_derivative = 2. * bulk_modulus * equilibrium_volume * (
+            -2. * bracket / k0pm1 ** 3 + 4.5 * length_strain ** 2 * exponential_factor / k0pm1)
+    d_volume = (2. * bulk_modulus * bracket / k0pm1 ** 2 -
+                3. * bulk_modulus * length_strain * reduced_volume_lengths * exponential_factor)
+    return np.stack(np.broadcast_arrays(d_energy, d_bulk_modulus, d_bulk_modulus_derivative, d_volume), axis=-1)
+
+
+# Equations of state and their Jacobians by name
+EQUATIONS_OF_STATE = {
+    'vinet': vinet,
+    'murnaghan': murnaghan,
+    'birch-murnaghan': birch_murnaghan,
+}
+EQUATION_OF_STATE_JACOBIANS = {
+    'vinet': vinet_jacobian,
+    'murnaghan': murnaghan_jacobian,
+    'birch-murnaghan': birch_murnaghan_jacobian,
+}
+
+
 if __name__ == "__main__":
     # import matplotlib
     # matplotlib.use('macosx')
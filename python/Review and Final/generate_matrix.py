@@ -4,19 +4,163 @@ Generates square matrix for finding eigenvectors and eigenvalues to model a one-
 
 __author__ = 'Ryan Glusic and William Parker'
 
+from functools import lru_cache
+
 import numpy as np
 
 
-def generate_matrix(minimum_x, maximum_x, number_of_dimensions, potential_name, potential_parameter):
+def harmonic_potential(horizontal_grid, potential_parameter):
+    """
+    Harmonic well V(x) = m (omega x)^2 / 2 with omega = parameter * hbar / (m L^2), L the grid length
+    """
+    grid_length = horizontal_grid[-1] - horizontal_grid[0]
+    angular_frequency = potential_parameter / grid_length**2
+    return 0.5 * np.power(angular_frequency * horizontal_grid, 2)
+
+
+def sinusoidal_potential(horizontal_grid, potential_parameter):
+    """
+    Half sine wave across the grid with amplitude 5 * parameter * hbar^2 / (2 m L^2)
+    """
+    well_width = horizontal_grid[-1] - horizontal_grid[0]
+    wave_vector = np.pi / well_width
+    prefactor = 5 * potential_parameter / (2. * well_width**2)
+    return prefactor * np.sin(wave_vector * (horizontal_grid + 0.5*well_width))
+
+
+def square_potential(horizontal_grid, potential_parameter):
+    """
+    Square well over the middle half of the grid, with walls of height parameter * (L / 2) outside it
+    """
+    number_of_dimensions = len(horizontal_grid)
+    well_width = (horizontal_grid[-1] - horizontal_grid[0]) / 2.
+    well_depth = potential_parameter * well_width
+    number_of_well_points = int(number_of_dimensions / 2.)
+    number_of_outside_points = int(number_of_dimensions / 4.)
+    potential = np.zeros(number_of_dimensions)
+    potential[0:number_of_outside_points] = well_depth
+    potential[number_of_well_points+number_of_outside_points:] = well_depth
+    return potential
+
+
+def free_potential(horizontal_grid, potential_parameter):
+    """
+    Zero potential (free particle in a box)
+    """
+    return np.zeros(len(horizontal_grid))
+
+
+# Potential name -> vectorized function V(horizontal_grid, potential_parameter) in units hbar = m = 1
+POTENTIALS = {
+    'harmonic': harmonic_potential,
+    'sinusoidal': sinusoidal_potential,
+    'square': square_potential,
+    'free': free_potential,
+}
+
+
+def register_potential(potential_name, potential_function):
+    """
+    Adds (or replaces) a potential usable by name in generate_matrix
+    :param potential_name:          str :: name to register the potential under
+    :param potential_function:      callable :: vectorized V(horizontal_grid, potential_parameter) -> NumPy array(N)
+    """
+    if not callable(potential_function):
+        raise TypeError(f"potential_function must be callable; got {type(potential_function)}")
+    POTENTIALS[potential_name] = potential_function
+    evaluate_potential.cache_clear()
+
+
+def register_tabulated_potential(potential_name, filename):
+    """
+    Registers a potential tabulated as two columns (x, V) in a text file, linearly interpolated onto the
+    grid (and held constant beyond the table) and multiplied by the potential parameter
+    :param potential_name:          str :: name to register the potential under
+    :param filename:                str :: two-column text file of positions and potential values
+    """
+    from read_two_columns_text import read_two_columns_text
+
+    table_x, table_potential = read_two_columns_text(filename)
+    order = np.argsort(table_x)
+    table_x, table_potential = table_x[order], table_potential[order]
+
+    def tabulated_potential(horizontal_grid, potential_parameter):
+        return potential_parameter * np.interp(horizontal_grid, table_x, table_potential)
+
+    register_potential(potential_name, tabulated_potential)
+
+
+# Central-difference weights of the second derivative (times h^2), from the diagonal outwards
+SECOND_DERIVATIVE_STENCILS = {
+    3: [-2., 1.],
+    5: [-5/2, 4/3, -1/12],
+    7: [-49/18, 3/2, -3/20, 1/90],
+    9: [-205/72, 8/5, -1/5, 8/315, -1/560],
+}
+
+# Largest grid for the dense Numerov Hamiltonian of generate_matrix, about 200 MB; larger grids
+# go through calculate_lowest_eigenvectors_numerov, which only stores tridiagonal matrices
+NUMEROV_DENSE_MAX_POINTS = 5000
+
+
+# Potential arrays kept by evaluate_potential: enough for the repeated evaluations of one solve
+# (cache key, then Hamiltonian) and a few alternating grids, without holding one large N-array
+# per past grid (8 MB each at N = 10^6) for the life of every process
+POTENTIAL_CACHE_SIZE = 4
+
+
+@lru_cache(maxsize=POTENTIAL_CACHE_SIZE)
+def evaluate_potential(minimum_x, maximum_x, number_of_dimensions, potential_name, potential_parameter):
+    """
+    Evaluates a registered potential once per grid; repeated calls with the same grid are served from a cache
+    :return:                        NumPy array(N) :: read-only potential values on the grid
+    """
+    if potential_name not in POTENTIALS:
+        raise ValueError(f"Unknown potential {potential_name!r}; registered potentials are {sorted(POTENTIALS)}")
+
+    horizontal_grid = np.linspace(minimum_x, maximum_x, num=number_of_dimensions)
+    potential = np.asarray(POTENTIALS[potential_name](horizontal_grid, potential_parameter), dtype=float)
+    if potential.shape != (number_of_dimensions,):
+        raise IndexError(f"Potential {potential_name!r} must return shape ({number_of_dimensions},); "
+                         f"got {potential.shape}")
+    potential.flags.writeable = False
+    return potential
+
+
+def generate_matrix(minimum_x, maximum_x, number_of_dimensions, potential_name, potential_parameter,
+                    matrix_format='dense', stencil=3):
     """
     Generates an NxN Hamiltonian matrix for a one-dimensional potential on a spatial grid
     :param minimum_x:               float :: left endpoint of the spatial grid
     :param maximum_x:               float :: right endpoint of the spatial grid
     :param number_of_dimensions:    int :: N, number of dimensions of the matrix and number of grid points of grid
-    :param potential_name:          str :: name of potential to use ('harmonic', 'sinusoidal', 'square')
+    :param potential_name:          str :: name of a registered potential ('harmonic', 'sinusoidal', 'square', 'free',
+                                           or one added with register_potential)
     :param potential_parameter:     float :: single parameter to adjust potential (affects magnitude of potential)
-    :return:                        NumPy array (N,N) :: Hamiltonian matrix created from potential
+    :param matrix_format:           str, optional :: storage of the returned matrix ('dense', 'banded', 'sparse')
+    :param stencil:                 int or str, optional :: second-derivative stencil, 3, 5, 7 or 9 points
+                                    (error O(h^2) to O(h^8)), or 'numerov' (O(h^4), dense, at most
+                                    NUMEROV_DENSE_MAX_POINTS points; see calculate_lowest_eigenvectors_numerov)
+    :return:                        NumPy array (N,N) :: Hamiltonian matrix created from potential ('dense'),
+                                    NumPy array (u+1,N) :: upper banded form with u = (stencil - 1) / 2, row u the
+                                                           diagonal and row u - k the k-th superdiagonal padded on
+                                                           the left ('banded'), or
+                                    SciPy CSR array (N,N) :: sparse Hamiltonian matrix ('sparse')
     """
+    if matrix_format not in ('dense', 'banded', 'sparse'):
+        raise ValueError(f"matrix_format must be 'dense', 'banded' or 'sparse'; got {matrix_format!r}")
+    if stencil not in SECOND_DERIVATIVE_STENCILS and stencil != 'numerov':
+        raise ValueError(f"stencil must be one of {sorted(SECOND_DERIVATIVE_STENCILS)} or 'numerov'; got {stencil!r}")
+    if stencil == 'numerov' and matrix_format != 'dense':
+        raise ValueError("The Numerov Hamiltonian B^-1 A is dense; use matrix_format='dense', or "
+                         "calculate_lowest_eigenvectors_numerov for the tridiagonal generalized problem")
+    if stencil == 'numerov' and number_of_dimensions > NUMEROV_DENSE_MAX_POINTS:
+        raise ValueError(f"The dense Numerov Hamiltonian is limited to N = {NUMEROV_DENSE_MAX_POINTS} grid points; "
+                         f"got N = {number_of_dimensions}, use calculate_lowest_eigenvectors_numerov instead")
+    stencil_width = 3 if stencil == 'numerov' else stencil
+    if number_of_dimensions < stencil_width:
+        raise ValueError(f"stencil={stencil!r} needs at least N = {stencil_width} grid points; "
+                         f"got N = {number_of_dimensions}")
 
     action_quantum = 1.0
     mass = 1.0
@@ -24,43 +168,128 @@ def generate_matrix(minimum_x, maximum_x, number_of_dimensions, potential_name,
     grid_spacing = (maximum_x - minimum_x)/(number_of_dimensions - 1)
     units_prefactor = action_quantum**2 / (2 * mass * grid_spacing**2)
 
-    horizontal_grid = np.linspace(minimum_x, maximum_x, num=number_of_dimensions)
-    if potential_name == 'harmonic':
-        angular_frequency = potential_parameter * action_quantum / (mass * (maximum_x - minimum_x)**2)
-        reduced_potential = 0.5 * mass * np.power(angular_frequency * horizontal_grid, 2) / units_prefactor
-
-    elif potential_name == 'sinusoidal':
-        well_width = (maximum_x - minimum_x)
-        wave_vector = np.pi / well_width
-        prefactor = 5 * potential_parameter * action_quantum**2 / (2. * mass * well_width**2)
-        reduced_potential = prefactor * np.sin(wave_vector * (horizontal_grid + 0.5*well_width)) / units_prefactor
-
-    elif potential_name == 'square':
-        well_width = (maximum_x - minimum_x) / 2.
-        well_depth = potential_parameter * well_width
-        number_of_well_points = int(number_of_dimensions / 2.)
-        number_of_outside_points = int(number_of_dimensions / 4.)
-        reduced_potential = np.zeros(len(horizontal_grid))
-        reduced_potential[0:number_of_outside_points] = well_depth
-        reduced_potential[number_of_well_points+number_of_outside_points:] = well_depth
-        reduced_potential /= units_prefactor
-
-    else:
-        horizontal_grid = np.linspace(minimum_x, maximum_x, num=number_of_dimensions)
-        reduced_potential = 0. * horizontal_grid
-
-    off_diagonal_terms_array = -1. * np.ones(number_of_dimensions-1)
-    diagonal_terms_array = np.full(number_of_dimensions, 2) + reduced_potential
-
-    matrix_one = np.diagflat(off_diagonal_terms_array, -1)
-    matrix_two = np.diagflat(diagonal_terms_array)
-    matrix_three = np.diagflat(off_diagonal_terms_array, 1)
-
-    matrix_total = units_prefactor*(matrix_one + matrix_two + matrix_three)
+    reduced_potential = evaluate_potential(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                           potential_parameter) / units_prefactor
+
+    if stencil == 'numerov':
+        from scipy.linalg import solve_banded
+
+        second_difference, numerov_bands = numerov_bands_matrices(number_of_dimensions)
+        dense_second_difference = (np.diagflat(second_difference[0, 1:], 1) + np.diagflat(second_difference[1]) +
+                                   np.diagflat(second_difference[2, :-1], -1))
+        kinetic_matrix = -solve_banded((1, 1), numerov_bands, dense_second_difference)
+        # B^-1 A is symmetric (A and B commute), remove the rounding asymmetry of the solve
+        kinetic_matrix = 0.5 * (kinetic_matrix + kinetic_matrix.T)
+        return units_prefactor * (kinetic_matrix + np.diagflat(reduced_potential))
+
+    # Kinetic term -psi''/2 in units of the prefactor is minus the stencil weights
+    weights = SECOND_DERIVATIVE_STENCILS[stencil]
+    bandwidth = len(weights) - 1
+    diagonal_terms_array = np.full(number_of_dimensions, -weights[0]) + reduced_potential
+    off_diagonal_terms_arrays = [-weight * np.ones(number_of_dimensions-offset)
+                                 for offset, weight in enumerate(weights[1:], start=1)]
+
+    if matrix_format == 'banded':
+        # Only the nonzero bands are stored, O(N) memory instead of O(N^2)
+        banded_matrix = np.zeros((bandwidth + 1, number_of_dimensions))
+        for offset, off_diagonal_terms_array in enumerate(off_diagonal_terms_arrays, start=1):
+            banded_matrix[bandwidth - offset, offset:] = off_diagonal_terms_array
+        banded_matrix[bandwidth] = diagonal_terms_array
+        return units_prefactor * banded_matrix
+
+    if matrix_format == 'sparse':
+        from scipy.sparse import diags_array
+
+        diagonals = [units_prefactor * diagonal_terms_array]
+        offsets = [0]
+        for offset, off_diagonal_terms_array in enumerate(off_diagonal_terms_arrays, start=1):
+            diagonals += [units_prefactor * off_diagonal_terms_array] * 2
+            offsets += [-offset, offset]
+        return diags_array(diagonals, offsets=offsets, format='csr')
+
+    matrix_total = np.diagflat(diagonal_terms_array)
+    for offset, off_diagonal_terms_array in enumerate(off_diagonal_terms_arrays, start=1):
+        matrix_total += np.diagflat(off_diagonal_terms_array, -offset) + np.diagflat(off_diagonal_terms_array, offset)
+
+    matrix_total = units_prefactor*matrix_total
 
     return matrix_total
 
 
+def numerov_bands_matrices(number_of_dimensions):
+    """
+    Tridiagonal matrices of the Numerov discretization psi'' = B^-1 A psi / h^2, with
+    A = [1, -2, 1] and B = [1, 10, 1] / 12, in the (3, N) general banded form of solve_banded
+    :return:                        NumPy array (3,N) :: A, NumPy array (3,N) :: B
+    """
+    second_difference = np.vstack([np.ones(number_of_dimensions), np.full(number_of_dimensions, -2.),
+                                   np.ones(number_of_dimensions)])
+    numerov_bands = np.vstack([np.full(number_of_dimensions, 1/12), np.full(number_of_dimensions, 10/12),
+                               np.full(number_of_dimensions, 1/12)])
+    for bands in (second_difference, numerov_bands):
+        bands[0, 0] = bands[2, -1] = 0.
+    return second_difference, numerov_bands
+
+
+def calculate_lowest_eigenvectors_numerov(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                          potential_parameter, number_of_eigenvectors=3):
+    """
+    Lowest eigenpairs of the Numerov Hamiltonian H = -B^-1 A / (2 h^2) + V without forming it: H is
+    symmetric, so shift-inverted Lanczos applies, with H x from one tridiagonal solve with B and
+    (H - sigma)^-1 x = (-A / (2 h^2) + B (V - sigma))^-1 B x from one tridiagonal factorization,
+    O(N) memory and work per iteration
+    :param number_of_eigenvectors:  int, optional :: K, number of lowest eigenpairs to return
+    :return:                        NumPy array(K) :: lowest eigenvalues,
+                                    NumPy array(K, N) :: matching eigenvectors as rows
+    """
+    from scipy.sparse import diags_array
+    from scipy.sparse.linalg import LinearOperator, eigsh, splu
+
+    K = number_of_eigenvectors
+    if not isinstance(K, int) or K < 1 or K > number_of_dimensions:
+        raise IndexError(f"number_of_eigenvectors must be 1 ≤ K ≤ {number_of_dimensions}; got {K}")
+    if K >= number_of_dimensions - 1 or number_of_dimensions <= 3:
+        # ARPACK needs K < N - 1; tiny problems are cheap to solve densely
+        from scipy.linalg import eigh
+
+        hamiltonian = generate_matrix(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                      potential_parameter, stencil='numerov')
+        energies, vectors = eigh(hamiltonian, subset_by_index=[0, K - 1])
+        return energies, vectors.T
+
+    grid_spacing = (maximum_x - minimum_x)/(number_of_dimensions - 1)
+    units_prefactor = 1 / (2 * grid_spacing**2)
+    reduced_potential = evaluate_potential(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                           potential_parameter) / units_prefactor
+
+    def tridiagonal(bands):
+        return diags_array([bands[0, 1:], bands[1], bands[2, :-1]], offsets=[1, 0, -1], format='csc')
+
+    second_difference, numerov_bands = (tridiagonal(bands) for bands in numerov_bands_matrices(number_of_dimensions))
+    numerov_factor = splu(numerov_bands)
+
+    # The kinetic term is positive, so the spectrum lies above min V; shift one energy unit below it
+    # (not one unit of the prefactor, which would bunch up the shift-inverted eigenvalues on fine grids)
+    shift = np.min(reduced_potential) - 1.0 / units_prefactor
+    shifted_factor = splu((-second_difference + numerov_bands @ diags_array(reduced_potential - shift)).tocsc())
+
+    def hamiltonian_product(vectors):
+        return -numerov_factor.solve(second_difference @ vectors) + reduced_potential[:, None] * vectors
+
+    def shifted_inverse_product(vectors):
+        return shifted_factor.solve(numerov_bands @ vectors)
+
+    shape = (number_of_dimensions, number_of_dimensions)
+    energies, vectors = eigsh(
+        LinearOperator(shape, matvec=lambda x: hamiltonian_product(x.reshape(-1, 1)).ravel(),
+                       matmat=hamiltonian_product, dtype=float),
+        k=K, sigma=shift, which='LM',
+        OPinv=LinearOperator(shape, matvec=lambda x: shifted_inverse_product(x.reshape(-1, 1)).ravel(),
+                             matmat=shifted_inverse_product, dtype=float))
+    order = np.argsort(energies)
+    return units_prefactor * energies[order], vectors[:, order].T
+
+
 if __name__ == "__main__":
     dimension_number = 400
     length_scale = 1
@@ -0,0 +1,234 @@
+"""
+Generates two- and three-dimensional Hamiltonians on square/cubic grids as sparse Kronecker sums of the
+one-dimensional generate_matrix operator, and finds their lowest eigenpairs with a preconditioned
+iterative eigensolver
+"""
+
+import sys
+import numpy as np
+
+from generate_matrix import POTENTIALS, generate_matrix
+
+
+def radial_harmonic_potential(coordinates, potential_parameter):
+    """
+    Isotropic harmonic well V = m (omega r)^2 / 2 with omega = parameter * hbar / (m L^2), L the grid length
+    """
+    grid_length = coordinates[0].max() - coordinates[0].min()
+    angular_frequency = potential_parameter / grid_length**2
+    return 0.5 * angular_frequency**2 * sum(np.power(coordinate, 2) for coordinate in coordinates)
+
+
+def soft_coulomb_potential(coordinates, potential_parameter):
+    """
+    Softened attractive Coulomb well V = -parameter / sqrt(r^2 + 1), finite at the origin
+    """
+    return -potential_parameter / np.sqrt(sum(np.power(coordinate, 2) for coordinate in coordinates) + 1.)
+
+
+# Potential name -> vectorized function V(coordinates, potential_parameter), coordinates a list of d
+# meshgrid arrays. Names not found here are looked up in generate_matrix.POTENTIALS and applied
+# separably, V(x) + V(y) (+ V(z))
+NONSEPARABLE_POTENTIALS = {
+    'radial_harmonic': radial_harmonic_potential,
+    'soft_coulomb': soft_coulomb_potential,
+}
+
+
+def register_nonseparable_potential(potential_name, potential_function):
+    """
+    Adds (or replaces) a non-separable potential usable by name in generate_matrix_nd
+    :param potential_name:          str :: name to register the potential under
+    :param potential_function:      callable :: vectorized V(coordinates, potential_parameter) on meshgrid arrays
+    """
+    if not callable(potential_function):
+        raise TypeError(f"potential_function must be callable; got {type(potential_function)}")
+    NONSEPARABLE_POTENTIALS[potential_name] = potential_function
+
+
+def generate_matrix_nd(minimum_x, maximum_x, number_of_dimensions, dimensionality, potential_name,
+                       potential_parameter, stencil=3):
+    """
+    Generates the (N^d)x(N^d) sparse Hamiltonian on a d-dimensional grid of N points per axis,
+    H = sum over axes of I x ... x H_1 x ... x I, plus the potential on the diagonal
+    :param minimum_x:               float :: lower endpoint of the grid along every axis
+    :param maximum_x:               float :: upper endpoint of the grid along every axis
+    :param number_of_dimensions:    int :: N, number of grid points per axis
+    :param dimensionality:          int :: d, number of spatial dimensions (2 or 3)
+    :param potential_name:          str :: non-separable potential in NONSEPARABLE_POTENTIALS, or a
+                                           generate_matrix potential applied separably along each axis
+    :param potential_parameter:     float :: single parameter to adjust potential
+    :param stencil:                 int, optional :: second-derivative stencil (3, 5, 7 or 9 points)
+    :return:                        SciPy CSR array (N^d, N^d) :: Hamiltonian, grid points in C order
+                                    (last axis fastest), matching np.meshgrid(..., indexing='ij')
+    """
+    from scipy.sparse import diags_array, identity, kron
+
+    if dimensionality not in (2, 3):
+        raise ValueError(f"dimensionality must be 2 or 3; got {dimensionality}")
+    if potential_name not in NONSEPARABLE_POTENTIALS and potential_name not in POTENTIALS:
+        raise ValueError(f"Unknown potential {potential_name!r}; registered potentials are "
+                         f"{sorted(NONSEPARABLE_POTENTIALS) + sorted(POTENTIALS)}")
+
+    separable = potential_name not in NONSEPARABLE_POTENTIALS
+    axis_hamiltonian = generate_matrix(minimum_x, maximum_x, number_of_dimensions,
+                                       potential_name if separable else 'free', potential_parameter,
+                                       matrix_format='sparse', stencil=stencil)
+    unit = identity(number_of_dimensions, format='csr')
+
+    hamiltonian = None
+    for axis in range(dimensionality):
+        term = None
+        for other_axis in range(dimensionality):
+            factor = axis_hamiltonian if other_axis == axis else unit
+            term = factor if term is None else kron(term, factor, format='csr')
+        hamiltonian = term if hamiltonian is None else hamiltonian + term
+
+    if not separable:
+        axis_grid = np.linspace(minimum_x, maximum_x, num=number_of_dimensions)
+        coordinates = np.meshgrid(*[axis_grid] * dimensionality, indexing='ij')
+        potential = NONSEPARABLE_POTENTIALS[potential_name](coordinates, potential_parameter)
+        hamiltonian = hamiltonian + diags_array(np.ravel(potential), format='csr')
+
+    return hamiltonian.tocsr()
+
+
+def separable_approximation(minimum_x, maximum_x, number_of_dimensions, dimensionality, potential_name,
+                            potential_parameter, stencil=3):
+    """
+    One-dimensional Hamiltonian per axis whose Kronecker sum approximates generate_matrix_nd: exact for
+    separable potentials, and for non-separable ones each axis gets the potential averaged over the other
+    axes (minus its share of the overall mean, so the constant is not counted d times)
+    :return: list(d) of NumPy array(N, N) :: dense one-dimensional Hamiltonians
+    """
+    if potential_name not in NONSEPARABLE_POTENTIALS:
+        axis_hamiltonian = generate_matrix(minimum_x, maximum_x, number_of_dimensions, potential_name,
+                                           potential_parameter, stencil=stencil)
+        return [axis_hamiltonian] * dimensionality
+
+    kinetic_matrix = generate_matrix(minimum_x, maximum_x, number_of_dimensions, 'free', 0., stencil=stencil)
+    axis_grid = np.linspace(minimum_x, maximum_x, num=number_of_dimensions)
+    potential = NONSEPARABLE_POTENTIALS[potential_name](
+        np.meshgrid(*[axis_grid] * dimensionality, indexing='ij'), potential_parameter)
+    mean_potential = np.mean(potential)
+    axis_hamiltonians = []
+    for axis in range(dimensionality):
+        other_axes = tuple(other_axis for other_axis in range(dimensionality) if other_axis != axis)
+        axis_potential = np.mean(potential, axis=other_axes) - mean_potential * (dimensionality - 1) / dimensionality
+        axis_hamiltonians.append(kinetic_matrix + np.diagflat(axis_potential))
+    return axis_hamiltonians
+
+
+def separable_preconditioner(axis_hamiltonians):
+    """
+    Fast-diagonalization inverse of a Kronecker sum of one-dimensional Hamiltonians H_a = Q_a L_a Q_a^T:
+    applies (sum_a H_a - sigma)^-1 with d products by N x N matrices per axis, sigma half the first
+    excitation gap below the lowest level so the operator stays positive definite
+    :return: function(NumPy array(N^d, ...)) -> NumPy array(N^d, ...) :: preconditioner,
+             NumPy array(N^d) :: eigenvalues of the Kronecker sum, in C grid order,
+             list(d) of NumPy array(N, N) :: eigenvectors Q_a of each axis Hamiltonian
+    """
+    from scipy.linalg import eigh
+
+    axis_solutions = [eigh(axis_hamiltonian) for axis_hamiltonian in axis_hamiltonians]
+    axis_vectors = [vectors for _, vectors in axis_solutions]
+    separable_energies = sum(np.meshgrid(*[energies for energies, _ in axis_solutions], indexing='ij'))
+    lowest_two = np.partition(separable_energies.ravel(), 1)[:2]
+    denominator = separable_energies - lowest_two[0] + 0.5 * (lowest_two[1] - lowest_two[0])
+    grid_shape = separable_energies.shape
+
+    def transform(block, matrices):
+        for axis, matrix in enumerate(matrices):
+            block = np.moveaxis(np.tensordot(matrix, block, axes=([1], [axis])), 0, axis)
+        return block
+
+    def apply(vectors):
+        block = vectors.reshape(grid_shape + (-1,))
+        block = transform(block, [vectors_a.T for vectors_a in axis_vectors]) / denominator[..., None]
+        return transform(block, axis_vectors).reshape(vectors.shape)
+
+    return apply, separable_energies.ravel(), axis_vectors
+
+
+def calculate_lowest_eigenvectors_nd(minimum_x, maximum_x, number_of_dimensions, dimensionality, potential_name,
+                                     potential_parameter, number_of_eigenvectors=3, stencil=3,
+                                     tolerance=1e-8, maximum_iterations=200):
+    """
+    Lowest eigenpairs of generate_matrix_nd by LOBPCG, started from the lowest product states of
+    separable_approximation and preconditioned with its fast-diagonalization inverse, so only sparse
+    matrix-vector products are needed and 100^3 grids fit in memory
+    :param number_of_eigenvectors:  int, optional :: K, number of lowest eigenpairs to return
+    :param tolerance:               float, optional :: LOBPCG residual tolerance relative to the spectral scale
+    :param maximum_iterations:      int, optional :: LOBPCG iteration limit
+    Warns with a RuntimeWarning when a returned pair has a residual norm |H x - E x| above the tolerance;
+    the guard vectors beyond the lowest K are not checked
+    :return:                        NumPy array(K) :: lowest eigenvalues,
+                                    NumPy array(K, N^d) :: matching eigenvectors as rows, in C grid order
+    """
+    import warnings
+    from scipy.sparse.linalg import LinearOperator, lobpcg
+
+    hamiltonian = generate_matrix_nd(minimum_x, maximum_x, number_of_dimensions, dimensionality,
+                                     potential_name, potential_parameter, stencil=stencil)
+    size = hamiltonian.shape[0]
+    K = number_of_eigenvectors
+    if not isinstance(K, int) or K < 1 or K > size:
+        raise IndexError(f"number_of_eigenvectors must be 1 ≤ K ≤ {size}; got {K}")
+
+    if size < 5 * K + 20:
+        # LOBPCG is meant for K << size; tiny grids are cheap to solve densely
+        from scipy.linalg import eigh
+
+        energies, vectors = eigh(hamiltonian.toarray(), subset_by_index=[0, K - 1])
+        return energies, vectors.T
+
+    preconditioner, separable_energies, axis_vectors = separable_preconditioner(separable_approximation(
+        minimum_x, maximum_x, number_of_dimensions, dimensionality, potential_name, potential_parameter, stencil))
+
+    # Initial block: the lowest product states of the separable approximation plus guard vectors, slightly
+    # randomized so symmetry sectors the product states miss still get found
+    block_size = min(K + max(K, 5), size // 5)
+    lowest_states = np.argsort(separable_energies)[:block_size]
+    initial_vectors = np.empty((size, block_size))
+    for column, state in enumerate(lowest_states):
+        product_state = np.ones(1)
+        for axis, index in enumerate(np.unravel_index(state, (number_of_dimensions,) * dimensionality)):
+            product_state = np.kron(product_state, axis_vectors[axis][:, index])
+        initial_vectors[:, column] = product_state
+    initial_vectors += 1e-2 * np.random.default_rng(0).standard_normal(initial_vectors.shape) / np.sqrt(size)
+
+    spectral_scale = abs(hamiltonian).sum(axis=1).max()
+    with warnings.catch_warnings():
+        # LOBPCG warns when any block vector, guard vectors included, misses the tolerance;
+        # convergence of the returned pairs is checked below instead
+        warnings.filterwarnings("ignore", message="Exited", category=UserWarning)
+        energies, vectors = lobpcg(hamiltonian, initial_vectors,
+                                   M=LinearOperator((size, size), matvec=preconditioner, matmat=preconditioner,
+                                                    dtype=float),
+                                   tol=tolerance * spectral_scale, maxiter=maximum_iterations, largest=False)
+    order = np.argsort(energies)[:K]
+    energies, vectors = energies[order], vectors[:, order]
+
+    residual_norms = np.linalg.norm(hamiltonian @ vectors - vectors * energies, axis=0)
+    if np.any(residual_norms > tolerance * spectral_scale):
+        warnings.warn(f"LOBPCG did not converge within {maximum_iterations} iterations: residual norms "
+                      f"{residual_norms} exceed the tolerance {tolerance * spectral_scale:.3g}",
+                      RuntimeWarning, stacklevel=2)
+    return energies, vectors.T
+
+
+if __name__ == "__main__":
+    import time
+
+    if len(sys.argv) == 5:
+        Ndim, dimensions, pot, param = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3], float(sys.argv[4])
+    else:
+        print("Usage: python generate_matrix_nd.py <Ndim> <dimensionality> <potential_name> <potential_parameter>")
+        print("Falling back to defaults: Ndim=40, dimensionality=3, potential='harmonic', parameter=400.0")
+        Ndim, dimensions, pot, param = 40, 3, 'harmonic', 400.0
+
+    start = time.perf_counter()
+    eigenvalues, _ = calculate_lowest_eigenvectors_nd(-10., 10., Ndim, dimensions, pot, param,
+                                                      number_of_eigenvectors=5)
+    print(f"{dimensions}-D {pot}, {Ndim}^{dimensions} points: E = {eigenvalues} "
+          f"({time.perf_counter() - start:.2f} s)")
@@ -1,7 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.lines import Line2D
-from typing import List
+from typing import List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from matplotlib.lines import Line2D
 
 
 def plot_data_with_fit(
@@ -9,10 +10,13 @@ def plot_data_with_fit(
     fit_curve: np.ndarray,
     data_format: str = 'o',
     fit_format: str = ''
-) -> List[Line2D]:
+) -> List["Line2D"]:
     """
    Accepts a (2,M) array, checks it, and returns a Line2D plot
     """
+    # Imported here so numbers-only callers never load matplotlib
+    import matplotlib.pyplot as plt
+
     if data.ndim != 2 or data.shape[0] != 2:
         raise IndexError(f"data must be shape (2, M), got {data.shape}")
     if fit_curve.ndim != 2 or fit_curve.shape[0] != 2:
@@ -35,14 +39,15 @@ def plot_data_with_fit(
 
 
 if __name__ == "__main__":
-   """
-   Tests using [[-2, -1, 0, 1, 2], [4, 1, 0, 1, 4]
+    """
+    Tests using [[-2, -1, 0, 1, 2], [4, 1, 0, 1, 4]
     and the fit_curve = [np.linspace(-2, 2),  np.linspace(-2, 2)**2]
-   """
+    """
+    import matplotlib.pyplot as plt
 
-data = np.array([[-2, -1, 0, 1, 2],
+    data = np.array([[-2, -1, 0, 1, 2],
                      [ 4,  1, 0, 1, 4]])
-xs = np.linspace(-2, 2, 100)
-fit = np.vstack([xs, xs**2])
-lines = plot_data_with_fit(data, fit, data_format='x', fit_format='--')
-plt.show()
\ No newline at end of file
+    xs = np.linspace(-2, 2, 100)
+    fit = np.vstack([xs, xs**2])
+    lines = plot_data_with_fit(data, fit, data_format='x', fit_format='--')
+    plt.show()
@@ -0,0 +1,129 @@
+"""
+Propagates wavefunctions in time under a generate_matrix Hamiltonian with the Crank-Nicolson
+scheme, streaming the frames from a generator or into a .npy file on disk
+"""
+
+import sys
+import itertools
+import numpy as np
+
+from generate_matrix import generate_matrix
+
+
+def gaussian_wavepacket(x, center, alpha, wave_number):
+    """
+    Normalized complex Gaussian wave packet exp(-(alpha (x - center))^2) exp(i k x), the complex
+    form of the wave packet in array-computing/plot_wavepacket.py at t = 0
+    :param x:               NumPy array(N) :: evenly spaced spatial grid
+    :param center:          float :: center of the envelope
+    :param alpha:           float :: inverse width of the envelope
+    :param wave_number:     float :: k, mean momentum of the packet (hbar = 1)
+    :return:                NumPy array(N) :: complex wavefunction with sum |psi|^2 dx = 1
+    """
+    wavefunction = np.exp(-(alpha * (x - center)) ** 2) * np.exp(1j * wave_number * x)
+    grid_spacing = x[1] - x[0]
+    return wavefunction / np.sqrt(np.sum(np.abs(wavefunction) ** 2) * grid_spacing)
+
+
+def hamiltonian_to_sparse(hamiltonian, matrix_format='banded'):
+    """
+    Converts a generate_matrix Hamiltonian ('dense', 'banded' upper form, or 'sparse') to a CSC array
+    """
+    from scipy.sparse import csc_array, diags_array
+
+    if matrix_format == 'sparse':
+        return csc_array(hamiltonian)
+    if matrix_format == 'dense':
+        return csc_array(np.asarray(hamiltonian))
+    if matrix_format != 'banded':
+        raise ValueError(f"matrix_format must be 'dense', 'banded' or 'sparse'; got {matrix_format!r}")
+
+    # Row u holds the diagonal, row u - k the k-th superdiagonal padded on the left
+    bandwidth = hamiltonian.shape[0] - 1
+    diagonals = [hamiltonian[bandwidth]]
+    offsets = [0]
+    for offset in range(1, bandwidth + 1):
+        band = hamiltonian[bandwidth - offset, offset:]
+        diagonals += [band, band]
+        offsets += [offset, -offset]
+    return diags_array(diagonals, offsets=offsets, format='csc')
+
+
+def propagate_wavefunction(initial_wavefunction, hamiltonian, time_step, number_of_steps,
+                           frame_interval=1, matrix_format='banded'):
+    """
+    Generator of Crank-Nicolson time steps (1 + i dt H / 2) psi(t + dt) = (1 - i dt H / 2) psi(t),
+    which is unitary, so the norm is conserved for any time step. The left-hand band matrix is
+    factorized once and every step costs O(N)
+    :param initial_wavefunction:    NumPy array(N) :: wavefunction at t = 0
+    :param hamiltonian:             Hamiltonian from generate_matrix, in the given matrix_format
+    :param time_step:               float :: dt (hbar = 1)
+    :param number_of_steps:         int :: number of time steps to take
+    :param frame_interval:          int, optional :: yield every frame_interval-th step
+    :param matrix_format:           str, optional :: 'dense', 'banded' or 'sparse'
+    :return:                        generator of (float, NumPy array(N)) :: (time, wavefunction), starting at t = 0
+    """
+    from scipy.sparse import identity
+    from scipy.sparse.linalg import splu
+
+    if frame_interval < 1:
+        raise ValueError(f"frame_interval must be >= 1; got {frame_interval}")
+
+    sparse_hamiltonian = hamiltonian_to_sparse(hamiltonian, matrix_format)
+    number_of_dimensions = sparse_hamiltonian.shape[0]
+    wavefunction = np.array(initial_wavefunction, dtype=complex)
+    if wavefunction.shape != (number_of_dimensions,):
+        raise IndexError(f"initial_wavefunction must be shape ({number_of_dimensions},); got {wavefunction.shape}")
+
+    half_step = 0.5j * time_step * sparse_hamiltonian
+    unit = identity(number_of_dimensions, dtype=complex, format='csc')
+    backward = splu((unit + half_step).tocsc())
+    forward = (unit - half_step).tocsr()
+
+    yield 0., wavefunction.copy()
+    for step in range(1, number_of_steps + 1):
+        wavefunction = backward.solve(forward @ wavefunction)
+        if step % frame_interval == 0:
+            yield step * time_step, wavefunction.copy()
+
+
+def save_frames(frames, filename, number_of_frames, number_of_dimensions):
+    """
+    Streams frames from propagate_wavefunction into a memory-mapped .npy file of shape
+    (number_of_frames, N), one frame in memory at a time. Takes exactly number_of_frames
+    frames from the stream and raises a ValueError if it ends sooner
+    :return: NumPy array(number_of_frames) :: times of the saved frames
+    """
+    stored = np.lib.format.open_memmap(filename, mode='w+', dtype=complex,
+                                       shape=(number_of_frames, number_of_dimensions))
+    times = np.full(number_of_frames, np.nan)
+    number_written = 0
+    for index, (time, wavefunction) in enumerate(itertools.islice(frames, number_of_frames)):
+        stored[index] = wavefunction
+        times[index] = time
+        number_written = index + 1
+    stored.flush()
+    del stored
+    if number_written < number_of_frames:
+        raise ValueError(f"The frame stream ended after {number_written} of {number_of_frames} frames; "
+                         f"{filename} holds zeros from frame {number_written} on")
+    return times
+
+
+if __name__ == "__main__":
+    # Gaussian released off-center in a harmonic well: <x> should oscillate, norm stay 1
+    minimum_x, maximum_x = -10., 10.
+    dimension_number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    step_number = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    x_values = np.linspace(minimum_x, maximum_x, dimension_number)
+    grid_spacing = x_values[1] - x_values[0]
+    hamiltonian_bands = generate_matrix(minimum_x, maximum_x, dimension_number, 'harmonic', 400.,
+                                        matrix_format='banded')
+    psi_0 = gaussian_wavepacket(x_values, center=-3., alpha=1., wave_number=0.)
+
+    for t, psi in propagate_wavefunction(psi_0, hamiltonian_bands, time_step=0.01,
+                                         number_of_steps=step_number, frame_interval=step_number // 10):
+        probability = np.abs(psi) ** 2
+        print(f"t = {t:7.3f}   norm = {np.sum(probability) * grid_spacing:.10f}   "
+              f"<x> = {np.sum(x_values * probability) * grid_spacing:+.4f}")
@@ -1,5 +1,8 @@
+import os
+import itertools
 import numpy as np
 
+
 def read_two_columns_text(filename: str) -> np.ndarray:
     """
     Uses a string as input, outputs a 2D array, one dimension for x and y values respectively.
@@ -12,8 +15,59 @@ def read_two_columns_text(filename: str) -> np.ndarray:
         raise
     return data
 
+
+def read_two_columns_cached(filename: str, mmap_mode: str = 'r') -> np.ndarray:
+    """
+    Same output as read_two_columns_text, but keeps a binary copy next to the text
+    file (filename + '.npy') and memory-maps it on later reads. The copy is
+    rebuilt whenever the text file's size or modification time changes.
+    """
+    cache_filename = filename + '.npy'
+    stamp_filename = cache_filename + '.stamp'
+
+    status = os.stat(filename)
+    stamp = f"{status.st_size} {status.st_mtime_ns}"
+
+    try:
+        with open(stamp_filename) as stamp_file:
+            if stamp_file.read().strip() == stamp:
+                return np.load(cache_filename, mmap_mode=mmap_mode)
+    except (OSError, ValueError):
+        # Missing or unreadable cache, rebuild it below
+        pass
+
+    data = read_two_columns_text(filename)
+    try:
+        np.save(cache_filename, data)
+        with open(stamp_filename, 'w') as stamp_file:
+            stamp_file.write(stamp)
+    except OSError:
+        # Read-only directory, just return the parsed data
+        pass
+    return data
+
+
+def read_two_columns_chunks(filename: str, chunk_size: int = 100_000):
+    """
+    Generator version of read_two_columns_text: yields (2, m) arrays of at most
+    chunk_size rows at a time, so files larger than memory can be streamed.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be >= 1; got {chunk_size}")
+
+    with open(filename) as file:
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+            if not lines:
+                return
+            # Comment and blank lines would make loadtxt warn about chunks without data
+            data_lines = [line for line in lines if line.split('#', 1)[0].strip()]
+            if data_lines:
+                yield np.loadtxt(data_lines, ndmin=2).T
+
+
 if __name__ == "__main__":
     # Test: read in volumes_energies.dat and print data with its shape
     text_file = "volumes_energies.dat"
     data = read_two_columns_text(text_file)
-    print(f"{data=}, shape={data.shape}")
\ No newline at end of file
+    print(f"{data=}, shape={data.shape}")
@@ -0,0 +1,102 @@
+"""
+Compares how fast the lowest eigenvalues of generate_matrix converge with the number of grid
+points for each finite-difference stencil, to pick the cheapest grid for a target accuracy
+"""
+
+import sys
+import numpy as np
+
+from generate_matrix import SECOND_DERIVATIVE_STENCILS, calculate_lowest_eigenvectors_numerov, generate_matrix
+from calculate_lowest_eigenvectors import calculate_lowest_eigenvectors
+
+MIN_X = -10.0
+MAX_X = 10.0
+DIMENSION_NUMBERS_DEFAULT = [25, 50, 100, 200, 400]
+STENCILS_DEFAULT = [3, 5, 7, 9, 'numerov']
+
+
+def lowest_energies(Ndim: int, potential_name: str, potential_parameter: float,
+                    number_of_eigenvalues: int, stencil=3) -> np.ndarray:
+    """
+    Lowest eigenvalues for one grid and stencil, banded for the finite-difference
+    stencils and tridiagonal shift-inverted Lanczos for Numerov.
+    """
+    if stencil == 'numerov':
+        return calculate_lowest_eigenvectors_numerov(MIN_X, MAX_X, Ndim, potential_name, potential_parameter,
+                                                     number_of_eigenvalues)[0]
+
+    H = generate_matrix(MIN_X, MAX_X, Ndim, potential_name, potential_parameter,
+                        matrix_format='banded', stencil=stencil)
+    return calculate_lowest_eigenvectors(H, number_of_eigenvalues, matrix_format='banded')[0]
+
+
+def stencil_convergence_report(
+    potential_name: str = 'harmonic',
+    potential_parameter: float = 400.0,
+    dimension_numbers: list = None,
+    stencils: list = None,
+    number_of_eigenvalues: int = 5,
+    reference_energies: np.ndarray = None
+) -> np.ndarray:
+    """
+    Returns a structured array with one row per (stencil, Ndim) holding the absolute
+    errors of the lowest eigenvalues and their maximum. Without reference_energies the
+    reference is the 9-point stencil on four times the largest grid.
+    """
+    dimension_numbers = dimension_numbers or DIMENSION_NUMBERS_DEFAULT
+    stencils = stencils or STENCILS_DEFAULT
+
+    if reference_energies is None:
+        reference_energies = lowest_energies(4 * max(dimension_numbers), potential_name, potential_parameter,
+                                             number_of_eigenvalues, stencil=max(SECOND_DERIVATIVE_STENCILS))
+    reference_energies = np.asarray(reference_energies)[:number_of_eigenvalues]
+
+    report = np.zeros(len(stencils) * len(dimension_numbers), dtype=[
+        ('stencil', 'U7'),
+        ('Ndim', int),
+        ('max_error', float),
+        ('errors', float, (number_of_eigenvalues,)),
+    ])
+    row = 0
+    for stencil in stencils:
+        for Ndim in dimension_numbers:
+            errors = np.abs(lowest_energies(Ndim, potential_name, potential_parameter,
+                                            number_of_eigenvalues, stencil) - reference_energies)
+            report[row] = (str(stencil), Ndim, np.max(errors), errors)
+            row += 1
+    return report
+
+
+def print_convergence_report(report: np.ndarray):
+    """
+    Prints the maximum eigenvalue error for every grid size (rows) and stencil (columns),
+    with the observed order of convergence between successive grids in parentheses.
+    """
+    stencils = list(dict.fromkeys(report['stencil']))
+    dimension_numbers = list(dict.fromkeys(report['Ndim']))
+
+    print(f"{'Ndim':>8} " + " ".join(f"{stencil + '-point' if stencil.isdigit() else stencil:>20}"
+                                     for stencil in stencils))
+    for index, Ndim in enumerate(dimension_numbers):
+        cells = []
+        for stencil in stencils:
+            rows = report[report['stencil'] == stencil]
+            error = rows['max_error'][index]
+            if index == 0:
+                cells.append(f"{error:20.3e}")
+            else:
+                order = np.log(rows['max_error'][index - 1] / error) / np.log(Ndim / dimension_numbers[index - 1])
+                cells.append(f"{error:12.3e} ({order:5.2f})")
+        print(f"{Ndim:>8d} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        pot, param = sys.argv[1], float(sys.argv[2])
+    else:
+        print("Usage: python stencil_convergence.py <potential_name> <potential_parameter>")
+        print("Falling back to defaults: potential='harmonic', parameter=400.0")
+        pot, param = 'harmonic', 400.0
+
+    print(f"Maximum error of the lowest 5 eigenvalues, {pot} potential (observed order in parentheses)")
+    print_convergence_report(stencil_convergence_report(pot, param))
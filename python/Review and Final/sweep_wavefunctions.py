@@ -0,0 +1,108 @@
+"""
+Runs the one-dimensional quantum pipeline over grids of potentials, potential
+parameters and grid sizes in a process pool and tabulates the lowest eigenvalues
+"""
+
+import os
+import sys
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from FINAL_visualize_vectors_in_space import EIG_INDICES, calculate_wavefunctions
+
+NUMBER_OF_EIGENVALUES_DEFAULT = 5
+
+
+def solve_configuration(configuration: tuple, number_of_eigenvalues: int, save_plots: bool) -> np.ndarray:
+    """
+    Solves one (Ndim, potential_name, potential_parameter) configuration and
+    returns its lowest eigenvalues, saving the wavefunction plot if requested.
+    """
+    Ndim, potential_name, potential_parameter = configuration
+    needed = max(number_of_eigenvalues, max(EIG_INDICES) + 1) if save_plots else number_of_eigenvalues
+    x, energies, wavefuncs = calculate_wavefunctions(Ndim, potential_name, potential_parameter,
+                                                     number_of_eigenvectors=needed)
+
+    if save_plots:
+        from FINAL_visualize_vectors_in_space import plot_wavefunctions
+
+        indices_str = "".join(str(i) for i in EIG_INDICES)
+        outname = f"Masnik.{potential_name}.{potential_parameter:g}.N{Ndim}.Eigenvectors{indices_str}.png"
+        plot_wavefunctions(x, energies, wavefuncs, potential_name, outname=outname)
+
+    return energies[:number_of_eigenvalues]
+
+
+def sweep_wavefunctions(
+    dimension_numbers: list,
+    potential_names: list,
+    potential_parameters: list,
+    number_of_eigenvalues: int = NUMBER_OF_EIGENVALUES_DEFAULT,
+    save_plots: bool = False,
+    max_workers: int = None
+) -> np.ndarray:
+    """
+    Solves every combination of grid size, potential name and potential parameter
+    across a process pool. Returns a structured array with one row per configuration
+    holding 'Ndim', 'potential_name', 'potential_parameter' and the lowest
+    'energies'. Plots are only rendered when save_plots is True.
+    """
+    configurations = list(itertools.product(dimension_numbers, potential_names, potential_parameters))
+    if not configurations:
+        raise IndexError("Sweep needs at least one grid size, potential name and potential parameter")
+
+    results = np.zeros(len(configurations), dtype=[
+        ('Ndim', int),
+        ('potential_name', f'U{max(len(name) for name in potential_names)}'),
+        ('potential_parameter', float),
+        ('energies', float, (number_of_eigenvalues,)),
+    ])
+
+    if max_workers is None:
+        max_workers = min(len(configurations), os.cpu_count() or 1)
+    # Several configurations per task so short solves are not dominated by pickling
+    chunksize = max(1, len(configurations) // (4 * max_workers))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        solutions = executor.map(solve_configuration, configurations,
+                                 itertools.repeat(number_of_eigenvalues),
+                                 itertools.repeat(save_plots),
+                                 chunksize=chunksize)
+        for row, (configuration, energies) in enumerate(zip(configurations, solutions)):
+            results[row] = (*configuration, energies)
+
+    return results
+
+
+def print_results(results: np.ndarray):
+    """
+    Prints the sweep results as a table, one configuration per line.
+    """
+    number_of_eigenvalues = results['energies'].shape[1]
+    header = f"{'Ndim':>8} {'potential':>12} {'parameter':>10} " + \
+             " ".join(f"{f'E_{index}':>10}" for index in range(number_of_eigenvalues))
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        energies = " ".join(f"{energy:10.5f}" for energy in row['energies'])
+        print(f"{row['Ndim']:>8d} {row['potential_name']:>12} {row['potential_parameter']:>10.4g} {energies}")
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--save-plots"]
+    if len(arguments) not in (3, 4):
+        print("Usage: python sweep_wavefunctions.py <Ndim,...> <potential_name,...> "
+              "<potential_parameter,...> [number_of_eigenvalues] [--save-plots]")
+        print("Falling back to defaults: Ndim=100,200,400, potential='harmonic,square', parameter=1.0")
+        arguments = ["100,200,400", "harmonic,square", "1.0"]
+
+    sweep_results = sweep_wavefunctions(
+        [int(value) for value in arguments[0].split(",")],
+        arguments[1].split(","),
+        [float(value) for value in arguments[2].split(",")],
+        number_of_eigenvalues=int(arguments[3]) if len(arguments) == 4 else NUMBER_OF_EIGENVALUES_DEFAULT,
+        save_plots="--save-plots" in sys.argv,
+    )
+    print_results(sweep_results)
@@ -0,0 +1,125 @@
+"""
+Registry of unit conversion factors for the energy-volume workflow (rydberg, hartree, eV, kJ/mol,
+bohr, angstrom, GPa, ...). Unit expressions such as 'rydberg/bohr^3' or 'eV/atom' are composed
+from the registered base units, and every factor is computed once and cached
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Exponents of (length, energy) for each dimension used below
+LENGTH = (1, 0)
+ENERGY = (0, 1)
+COUNT = (0, 0)
+
+# Base unit name -> (dimension, value in SI units: metres, joules, or a plain count).
+# Filled from scipy.constants on first use, see base_units()
+_BASE_UNITS = {}
+
+# One factor of a unit expression: optional '*' or '/', a base unit name, an optional integer power
+_UNIT_FACTOR = r"\s*([*/]?)\s*([^*/^\s]+)\s*(?:\^\s*(-?\d+))?\s*"
+
+
+def base_units():
+    """
+    Returns the registered base units, filling in the CODATA-derived ones on the first call.
+    """
+    if not _BASE_UNITS:
+        from scipy import constants
+
+        bohr_radius = constants.physical_constants["Bohr radius"][0]
+        rydberg_energy = constants.physical_constants["Rydberg constant times hc in J"][0]
+        hartree_energy = constants.physical_constants["Hartree energy"][0]
+
+        defaults = {
+            "m": (LENGTH, 1.),
+            "angstrom": (LENGTH, 1e-10),
+            "bohr": (LENGTH, bohr_radius),
+            "J": (ENERGY, 1.),
+            "kJ": (ENERGY, 1e3),
+            "kcal": (ENERGY, 4184.),
+            "eV": (ENERGY, constants.electron_volt),
+            "rydberg": (ENERGY, rydberg_energy),
+            "hartree": (ENERGY, hartree_energy),
+            "Pa": ((-3, 1), 1.),
+            "GPa": ((-3, 1), 1e9),
+            # Counts: 'per atom' leaves a value unchanged, 'per mol' divides by Avogadro's number
+            "atom": (COUNT, 1.),
+            "mol": (COUNT, constants.Avogadro),
+        }
+        for name, (dimension, si_value) in defaults.items():
+            _BASE_UNITS.setdefault(name, (dimension, si_value))
+    return _BASE_UNITS
+
+
+def register_unit(unit_name, dimension, si_value):
+    """
+    Adds (or replaces) a base unit usable in unit expressions
+    :param unit_name:       str :: name of the unit, without '/', '*' or '^'
+    :param dimension:       tuple(2) of int :: exponents of (length, energy)
+    :param si_value:        float :: size of one unit in metres^a joules^b
+    """
+    if re.search(r"[/*^\s]", unit_name):
+        raise ValueError(f"Unit names cannot contain '/', '*', '^' or spaces; got {unit_name!r}")
+    base_units()[unit_name] = (tuple(dimension), float(si_value))
+    parse_unit.cache_clear()
+    conversion_factor.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def parse_unit(unit_expression):
+    """
+    Dimension and SI value of a unit expression of base units joined by '*' and '/', each with an
+    optional integer power, e.g. 'rydberg/bohr^3/atom' or 'kJ/mol'
+    :return: tuple(2) of int :: exponents of (length, energy), float :: value in SI units
+    """
+    units = base_units()
+    factors = re.findall(_UNIT_FACTOR, unit_expression)
+    if (not re.fullmatch(rf"(?:{_UNIT_FACTOR})+", unit_expression) or factors[0][0] == "*" or
+            any(operator == "" for operator, _, _ in factors[1:])):
+        raise ValueError(f"Malformed unit expression {unit_expression!r}")
+    dimension = np.zeros(2, dtype=int)
+    si_value = 1.
+    for operator, name, power in factors:
+        if name not in units:
+            raise ValueError(f"Unknown unit {name!r} in {unit_expression!r}; known units are {sorted(units)}")
+        exponent = (int(power) if power else 1) * (-1 if operator == "/" else 1)
+        unit_dimension, unit_si_value = units[name]
+        dimension += exponent * np.array(unit_dimension)
+        si_value *= unit_si_value ** exponent
+    return tuple(int(exponent) for exponent in dimension), si_value
+
+
+@lru_cache(maxsize=None)
+def conversion_factor(from_unit, to_unit):
+    """
+    Factor converting values in from_unit to to_unit
+    :param from_unit:       str :: unit expression of the values, e.g. 'rydberg/bohr^3'
+    :param to_unit:         str :: unit expression to convert to, e.g. 'GPa'
+    :return:                float :: multiply values by this factor
+    """
+    from_dimension, from_si_value = parse_unit(from_unit)
+    to_dimension, to_si_value = parse_unit(to_unit)
+    if from_dimension != to_dimension:
+        raise ValueError(f"Unsupported conversion: {from_unit} → {to_unit} (incompatible dimensions)")
+    return from_si_value / to_si_value
+
+
+def convert_units(value, from_unit, to_unit):
+    """
+    Converts a number or a whole array between unit expressions
+    :param value:           float or NumPy array :: values in from_unit
+    :param from_unit:       str :: unit expression of the values
+    :param to_unit:         str :: unit expression to convert to
+    :return:                float or NumPy array :: values in to_unit
+    """
+    return value * conversion_factor(from_unit, to_unit)
+
+
+if __name__ == "__main__":
+    for source, target in [("bohr^3/atom", "angstrom^3/atom"), ("rydberg/atom", "eV/atom"),
+                           ("rydberg/bohr^3", "GPa"), ("eV/angstrom^3", "GPa"), ("hartree", "rydberg"),
+                           ("eV", "kJ/mol"), ("rydberg/bohr^3", "eV/angstrom^3")]:
+        print(f"1 {source} = {conversion_factor(source, target):.12g} {target}")
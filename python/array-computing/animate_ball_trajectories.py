@@ -1,7 +1,11 @@
-import math
+import sys
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 
+# (y0, v0, θ in degrees) of each projectile
 initial_conditions = [
     (0.0, 10.0, 45.0),
     (5.0, 20.0, 60.0),
@@ -9,68 +13,98 @@ initial_conditions = [
 ]
 
 g = 9.81
+frames = 200
+
+# Above this many projectiles the trajectories are drawn thin and translucent,
+# without per-projectile labels and maximum-height lines
+COLLECTION_THRESHOLD = 20
+
 
 def time_of_flight(y0, v0, θ):
-    term = v0 * math.sin(θ)
-    return (term + math.sqrt(term**2 + 2*g*y0)) / g
+    term = v0 * np.sin(θ)
+    return (term + np.sqrt(term**2 + 2*g*y0)) / g
+
 
 def max_height(y0, v0, θ):
-    return y0 + (v0 * math.sin(θ))**2 / (2*g)
+    return y0 + (v0 * np.sin(θ))**2 / (2*g)
 
-tfs = [time_of_flight(y0, v0, math.radians(θ))
-       for y0, v0, θ in initial_conditions]
-t_max = max(tfs)
-frames = 200
-dt = t_max / (frames - 1)
-
-trajectories = []
-labels = []
-for y0, v0, θ_deg in initial_conditions:
-    θ = math.radians(θ_deg)
-    tf = time_of_flight(y0, v0, θ)
-    xs, ys = [], []
-    for i in range(frames):
-        t = i * dt
-        x = v0 * math.cos(θ) * t
-        y = y0 + v0 * math.sin(θ) * t - 0.5 * g * t*t
-        ys.append(max(y, 0.0))
-        xs.append(x)
-    trajectories.append((xs, ys))
-    labels.append(f"y₀={y0}, v₀={v0}, θ={θ_deg}°")
-
-fig, ax = plt.subplots()
-x_maxes = [v0*math.cos(math.radians(θ))*tf for (y0,v0,θ), tf in zip(initial_conditions, tfs)]
-ax.set_xlim(0, max(x_maxes))
-ax.set_ylim(0, 1.1*max(max_height(y0, v0, math.radians(θ))
-                       for y0, v0, θ in initial_conditions))
-ax.set_xlabel("x (m)")
-ax.set_ylabel("y (m)")
-ax.set_title("Projectile trajectories (animated)")
-colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
-
-lines = []
-for idx, (y0, v0, θ_deg) in enumerate(initial_conditions):
-    line, = ax.plot([], [], color=colors[idx], label=labels[idx])
-    lines.append(line)
-    h = max_height(y0, v0, math.radians(θ_deg))
-    ax.axhline(y=h, color=colors[idx], linestyle='--')
-
-ax.legend()
-
-def init():
-    for line in lines:
-        line.set_data([], [])
-    return lines
-
-def animate(frame):
-    for idx, line in enumerate(lines):
-        xs, ys = trajectories[idx]
-        line.set_data(xs[:frame+1], ys[:frame+1])
-    return lines
-
-ani = FuncAnimation(
-    fig, animate, init_func=init,
-    frames=frames, interval=50, blit=True
-)
-
-plt.show()
\ No newline at end of file
+
+def compute_trajectories(conditions, number_of_frames=frames):
+    """
+    Positions of every projectile at every frame in one broadcast array of shape
+    (projectiles, frames, 2) holding (x, y), with y held at 0 after landing.
+    All projectiles share the time axis, from 0 to the longest time of flight.
+    """
+    y0, v0, θ_deg = np.asarray(conditions, dtype=float).reshape(-1, 3).T[..., None]
+    θ = np.radians(θ_deg)
+    t_max = np.max(time_of_flight(y0, v0, θ))
+    t = np.linspace(0.0, t_max, number_of_frames)
+
+    positions = np.empty((len(y0), number_of_frames, 2))
+    positions[..., 0] = v0 * np.cos(θ) * t
+    positions[..., 1] = np.maximum(y0 + v0 * np.sin(θ) * t - 0.5 * g * t*t, 0.0)
+    return positions
+
+
+def random_conditions(number_of_projectiles, seed=0):
+    """
+    Random launch heights (0-10 m), speeds (5-25 m/s) and angles (15-75°).
+    """
+    random_generator = np.random.default_rng(seed)
+    return np.column_stack([
+        random_generator.uniform(0.0, 10.0, number_of_projectiles),
+        random_generator.uniform(5.0, 25.0, number_of_projectiles),
+        random_generator.uniform(15.0, 75.0, number_of_projectiles),
+    ])
+
+
+def main(conditions=initial_conditions):
+    conditions = np.asarray(conditions, dtype=float).reshape(-1, 3)
+    y0, v0, θ = conditions[:, 0], conditions[:, 1], np.radians(conditions[:, 2])
+    positions = compute_trajectories(conditions)
+    heights = max_height(y0, v0, θ)
+
+    fig, ax = plt.subplots()
+    ax.set_xlim(0, np.max(v0 * np.cos(θ) * time_of_flight(y0, v0, θ)))
+    ax.set_ylim(0, 1.1*np.max(heights))
+    ax.set_xlabel("x (m)")
+    ax.set_ylabel("y (m)")
+    ax.set_title("Projectile trajectories (animated)")
+
+    # All trajectories are one LineCollection: set_segments keeps the positions[:, :frame+1]
+    # views as they are, where Line2D.set_data would copy each history every frame
+    if len(conditions) > COLLECTION_THRESHOLD:
+        collection = LineCollection([], linewidths=0.5, alpha=0.5,
+                                    colors=plt.cm.viridis(np.linspace(0.0, 1.0, len(conditions))))
+    else:
+        colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        colors = [colors[idx % len(colors)] for idx in range(len(conditions))]
+        collection = LineCollection([], colors=colors)
+        handles = []
+        for idx, (y0_i, v0_i, θ_deg) in enumerate(conditions):
+            # Proxy artists for the legend, the collection itself has no per-line labels
+            handles.append(Line2D([], [], color=colors[idx], label=f"y₀={y0_i}, v₀={v0_i}, θ={θ_deg}°"))
+            ax.axhline(y=heights[idx], color=colors[idx], linestyle='--')
+        ax.legend(handles=handles)
+    ax.add_collection(collection)
+    artists = [collection]
+
+    def update(frame):
+        collection.set_segments(positions[:, :frame+1])
+        return artists
+
+    def init():
+        return update(-1)
+
+    ani = FuncAnimation(
+        fig, update, init_func=init,
+        frames=frames, interval=50, blit=True
+    )
+
+    plt.show()
+    return ani
+
+
+if __name__ == "__main__":
+    # Optional number of random launch conditions to animate instead of the three above
+    main(random_conditions(int(sys.argv[1])) if len(sys.argv) > 1 else initial_conditions)
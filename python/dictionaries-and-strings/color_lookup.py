@@ -0,0 +1,48 @@
+"""
+Memoized color lookup tables for linear color gradients, shared by the HR diagram
+(make_hertzsprung_russell_diagram.py) and the thermometer icons (project/temperature_icons.py)
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from matplotlib.colors import ListedColormap, to_rgba
+
+LUT_SIZE = 4096
+
+
+@lru_cache(maxsize=None)
+def gradient_lut(control_points, control_colors, size=LUT_SIZE):
+    """
+    Read-only (size, 4) RGBA table interpolating linearly between control colors,
+    the same gradient LinearSegmentedColormap.from_list builds, computed once per gradient.
+    control_points are increasing positions in [0, 1] (tuple), control_colors any
+    matplotlib color specifications (tuple).
+    """
+    control_rgba = np.array([to_rgba(color) for color in control_colors])
+    positions = np.linspace(0.0, 1.0, size)
+    lut = np.column_stack([np.interp(positions, control_points, control_rgba[:, channel])
+                           for channel in range(4)])
+    lut.flags.writeable = False
+    return lut
+
+
+@lru_cache(maxsize=None)
+def gradient_colormap(control_points, control_colors, name='gradient', size=LUT_SIZE):
+    """
+    Cached matplotlib colormap backed by gradient_lut, for imshow and scatter calls
+    that take a cmap.
+    """
+    return ListedColormap(gradient_lut(control_points, control_colors, size), name=name)
+
+
+def lookup_colors(values, lut, vmin, vmax):
+    """
+    RGBA colors of values (a number or an array) on a LUT spanning [vmin, vmax]:
+    one multiply-add and an array index, values outside the range get the end colors.
+    """
+    scale = (len(lut) - 1) / (vmax - vmin)
+    index = np.asarray((np.asarray(values, dtype=float) - vmin) * scale + 0.5)
+    np.clip(index, 0, len(lut) - 1, out=index)
+    np.nan_to_num(index, copy=False)
+    return np.take(lut, index.astype(np.intp), axis=0)
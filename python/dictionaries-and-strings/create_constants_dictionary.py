@@ -1,3 +1,34 @@
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+# Extra full names accepted by get_constant, matched like the names in the file:
+# case-insensitively and with underscores for spaces
+CONSTANT_ALIASES = {
+    'Avogadro number': ['Avogadro constant'],
+}
+
+# Symbols accepted by get_constant, matched exactly as written ('g' is not 'G')
+CONSTANT_SYMBOLS = {
+    'speed of light': ['c'],
+    'gravitational constant': ['G'],
+    'Planck constant': ['h'],
+    'elementary charge': ['e'],
+    'Avogadro number': ['N_A'],
+    'Boltzmann constant': ['k_B'],
+    'electron mass': ['m_e'],
+    'proton mass': ['m_p'],
+}
+
+# Layout version of the pickled store, caches of any other version are rebuilt
+STORE_FORMAT = 2
+
+# Absolute filename -> (file stamp, store), so each file is parsed once per process
+_loaded_stores = {}
+
+
 def parse_constants_file(filename):
     constants = {}
     with open(filename, 'r') as f:
@@ -25,6 +56,108 @@ def parse_constants_file(filename):
     return constants
 
 
+def normalize_constant_name(name):
+    """
+    Case-insensitive key for a constant name, with underscores and repeated spaces as single spaces.
+    """
+    return ' '.join(name.replace('_', ' ').split()).casefold()
+
+
+def build_constants_store(constants, aliases=CONSTANT_ALIASES, symbols=CONSTANT_SYMBOLS):
+    """
+    Turns the dictionary from parse_constants_file into a store: the names, a read-only array of
+    values (and the same values as Python floats, faster to index one at a time) and a list of
+    dimensions in file order, plus an index from every name, alias and symbol as written, and one
+    from the normalized names and aliases only, to the position in those lists.
+    """
+    names = list(constants)
+    values = np.array([constants[name]['value'] for name in names], dtype=float)
+    values.flags.writeable = False
+
+    index = {}
+    normalized_index = {}
+    for position, name in enumerate(names):
+        full_names = [name] + aliases.get(name, [])
+        for key in full_names + symbols.get(name, []):
+            index[key] = position
+        for key in full_names:
+            normalized_index.setdefault(normalize_constant_name(key), position)
+
+    return {
+        'names': names,
+        'values': values,
+        'scalars': values.tolist(),
+        'dimensions': [constants[name]['dimension'] for name in names],
+        'index': index,
+        'normalized_index': normalized_index,
+    }
+
+
+def load_constants_store(filename='constants.txt', cache_filename=None):
+    """
+    Returns the constants store of filename, parsing the text file only when neither this process
+    nor the pickle cache next to it (filename + '.pickle') holds a copy for its current size and
+    modification time in the current STORE_FORMAT.
+    """
+    status = os.stat(filename)
+    stamp = (status.st_size, status.st_mtime_ns)
+    key = os.path.abspath(filename)
+
+    if key in _loaded_stores and _loaded_stores[key][0] == stamp:
+        return _loaded_stores[key][1]
+
+    cache_filename = cache_filename or filename + '.pickle'
+    try:
+        with open(cache_filename, 'rb') as cache_file:
+            cached_format, cached_stamp, store = pickle.load(cache_file)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        # Missing or unreadable cache, or one from before STORE_FORMAT, rebuild it below
+        cached_format, cached_stamp, store = None, None, None
+
+    if cached_format != STORE_FORMAT or cached_stamp != stamp:
+        store = build_constants_store(parse_constants_file(filename))
+        try:
+            # Write then rename, so a concurrent reader never sees a half-written cache
+            file_descriptor, temporary_filename = tempfile.mkstemp(dir=os.path.dirname(key), suffix='.tmp')
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                pickle.dump((STORE_FORMAT, stamp, store), temporary_file)
+            os.replace(temporary_filename, cache_filename)
+        except OSError:
+            # Read-only directory, keep the store in memory only
+            pass
+
+    store['values'].flags.writeable = False
+    _loaded_stores[key] = (stamp, store)
+    return store
+
+
+def constant_position(store, name):
+    """
+    Position of a constant in the store arrays by name, alias or symbol, e.g. 'speed of light',
+    'Speed_Of_Light' or 'c'. Symbols are case-sensitive, names and aliases are not.
+    """
+    position = store['index'].get(name)
+    if position is None:
+        position = store['normalized_index'].get(normalize_constant_name(name))
+        if position is None:
+            raise KeyError(f"Unknown constant {name!r}; known constants are {store['names']}")
+    return position
+
+
+def get_constant(store, name):
+    """
+    Value of one constant by name, alias or symbol.
+    """
+    return store['scalars'][constant_position(store, name)]
+
+
+def get_constants(store, names):
+    """
+    NumPy array of the values of several constants, in the order of names.
+    """
+    return store['values'][[constant_position(store, name) for name in names]]
+
+
 if __name__ == '__main__':
     constants = parse_constants_file('constants.txt')
 
@@ -32,4 +165,8 @@ if __name__ == '__main__':
         print(f"{name:25s} → {info['value']:>12.6g}   [{info['dimension']}]")
 
     g_const = constants['gravitational constant']['value']
-    print(f"\nGravitational constant = {g_const:.6g} m^3/kg/s^2")
\ No newline at end of file
+    print(f"\nGravitational constant = {g_const:.6g} m^3/kg/s^2")
+
+    store = load_constants_store('constants.txt')
+    print(f"G = {get_constant(store, 'G'):.6g}, k_B = {get_constant(store, 'Boltzmann_constant'):.6g}")
+    print(f"m_e, m_p = {get_constants(store, ['m_e', 'm_p'])}")
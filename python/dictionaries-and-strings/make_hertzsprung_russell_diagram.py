@@ -1,13 +1,15 @@
 import os
+import sys
 import math
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.colors import LinearSegmentedColormap, Normalize
+
+from color_lookup import gradient_colormap, gradient_lut, lookup_colors
+from photometry import SPECTRAL_CLASSES, bv_to_temperature, magnitude_to_luminosity
 
 # Constants
 astronomical_unit = 1.495978707e11
 meters_to_parsec = 1.0 / (648000.0 * astronomical_unit / math.pi)
-M_SUN = 4.83
 
 # Five brightest stars in the sky
 brightest = {
@@ -18,6 +20,29 @@ brightest = {
     '91262': 'Vega',
 }
 
+# Star colors: B-V range and control colors of the gradient
+BV_MIN, BV_MAX = -0.33, 1.40
+BV_CONTROL_POINTS = (-0.33, 0.0, 0.3, 0.6, 1.0, 1.4)
+BV_CONTROL_COLORS = ('#9bb0ff', '#ffffff', '#fff4e8',
+                     '#ffd2a1', '#ffae8a', '#ff0000')
+# Control points rescaled to [0, 1]
+BV_GRADIENT_POINTS = tuple((bv - BV_MIN) / (BV_MAX - BV_MIN) for bv in BV_CONTROL_POINTS)
+
+# B-V positions of the spectral class labels on the top axis, one per class
+SPECTRAL_CLASS_TICKS_BV = np.array([-0.33, -0.02, 0.15, 0.44, 0.58, 0.81, 1.40])
+
+# Above this many stars main draws a density image instead of one marker per star
+DENSITY_THRESHOLD = 100_000
+DENSITY_BINS = (400, 500)
+
+# Columns of the catalogue read by read_catalogue
+CATALOGUE_DTYPE = np.dtype([
+    ('hip', np.int64),
+    ('parallax', float),
+    ('Vmag', float),
+    ('BV', float),
+])
+
 
 def read_file(filename):
     """
@@ -42,66 +67,117 @@ def read_file(filename):
     return hip_dict
 
 
+def read_catalogue(filename):
+    """
+    Columnar version of read_file: reads the HIP id, parallax, V magnitude and B-V
+    columns into one structured array, sorted by HIP id so stars can be found with
+    find_stars. Lines starting with '#' and extra columns are ignored.
+    """
+    base = os.path.dirname(__file__)
+    path = os.path.join(base, filename)
+
+    catalogue = np.loadtxt(path, dtype=CATALOGUE_DTYPE, comments='#', usecols=(0, 1, 2, 3), ndmin=1)
+    return catalogue[np.argsort(catalogue['hip'], kind='stable')]
+
+
+def find_stars(catalogue, hip_ids):
+    """
+    Positions of the given HIP ids in a catalogue from read_catalogue, -1 where absent
+    """
+    hip_ids = np.asarray(hip_ids, dtype=np.int64)
+    if len(catalogue) == 0:
+        return np.full(hip_ids.shape, -1)
+    positions = np.searchsorted(catalogue['hip'], hip_ids)
+    positions = np.minimum(positions, len(catalogue) - 1)
+    return np.where(catalogue['hip'][positions] == hip_ids, positions, -1)
+
+
 def parallax_to_distance(p_mas):
     """
-    Converts parallax mass to distance
+    Converts parallax mass to distance (a number or a NumPy array of parallaxes)
     """
-    p_rad = (p_mas / 1000 / 3600) * (2 * math.pi / 360)
-    return astronomical_unit / math.tan(p_rad)
+    p_rad = np.radians(np.asarray(p_mas) / 1000 / 3600)
+    return astronomical_unit / np.tan(p_rad)
 
 
 def apparent_to_absolute_magnitude(V, d_m):
     """
-    Converts apparent magnitude to absolute magnitude.
+    Converts apparent magnitude to absolute magnitude (numbers or NumPy arrays).
     """
-    d_pc = d_m * meters_to_parsec
-    return V - 5 * math.log10(d_pc) + 5
+    d_pc = np.asarray(d_m) * meters_to_parsec
+    return V - 5 * np.log10(d_pc) + 5
 
 
 def star_colormap(BV):
     """
-    Creation of star colormap based on BV.
+    Star colormap based on BV: returns BV normalized to [0, 1] and the
+    (cached) colormap to draw it with.
     """
-    bv_min, bv_max = -0.33, 1.40
-    control_bv = np.array([-0.33, 0.0, 0.3, 0.6, 1.0, 1.4])
-    control_colors = ['#9bb0ff', '#ffffff', '#fff4e8',
-                      '#ffd2a1', '#ffae8a', '#ff0000']
+    cmap = gradient_colormap(BV_GRADIENT_POINTS, BV_CONTROL_COLORS, 'bv_cmap')
+    return (np.asarray(BV) - BV_MIN) / (BV_MAX - BV_MIN), cmap
 
-    # Set control points to [0,1]
-    pts = (control_bv - bv_min) / (bv_max - bv_min)
-    cmap = LinearSegmentedColormap.from_list('bv_cmap',
-                                             list(zip(pts, control_colors)))
-    norm = Normalize(vmin=bv_min, vmax=bv_max)
-    return norm(BV), cmap
+
+def bv_to_rgba(BV):
+    """
+    RGBA star colors for B-V values straight from the precomputed lookup table.
+    """
+    return lookup_colors(BV, gradient_lut(BV_GRADIENT_POINTS, BV_CONTROL_COLORS), BV_MIN, BV_MAX)
 
 
-def main():
+def density_image(BVs, Mvs, bins=DENSITY_BINS):
+    """
+    Bins B-V against M_V into a 2-D histogram and returns it as one RGBA image:
+    each pixel is colored by bv_to_rgba at the mean B-V of its stars, with
+    opacity growing with the logarithm of the star count. Also returns the
+    extent [BV_min, BV_max, Mv_min, Mv_max] of the image for imshow.
+    """
+    nx, ny = bins
+    extent = [np.min(BVs), np.max(BVs), np.min(Mvs), np.max(Mvs)]
+    for low, high in ((0, 1), (2, 3)):
+        if extent[high] == extent[low]:
+            # No spread along this axis (e.g. one B-V value), pad it so the bins have a width
+            extent[low], extent[high] = extent[low] - 0.5, extent[high] + 0.5
+    column = np.clip(((BVs - extent[0]) / (extent[1] - extent[0]) * nx).astype(int), 0, nx - 1)
+    row = np.clip(((Mvs - extent[2]) / (extent[3] - extent[2]) * ny).astype(int), 0, ny - 1)
+    pixel = row * nx + column
+
+    counts = np.bincount(pixel, minlength=nx * ny).reshape(ny, nx)
+    BV_sums = np.bincount(pixel, weights=BVs, minlength=nx * ny).reshape(ny, nx)
+    mean_BVs = np.divide(BV_sums, counts, out=np.zeros_like(BV_sums), where=counts > 0)
+
+    image = bv_to_rgba(mean_BVs)
+    image[..., 3] = np.log1p(counts) / np.log1p(counts.max())
+    return image, extent
+
+
+def main(filename='hipparcos_data.txt', render_mode='auto'):
     """
     Reads data, constructs arrays, and plots the colored map.
     Two axes are created and scaled appropriately, complete with a signature.
-
+    render_mode 'scatter' draws every star, 'density' a binned image, and
+    'auto' switches to the image above DENSITY_THRESHOLD stars.
     """
-    hip = read_file('hipparcos_data.txt')
+    if render_mode not in ('auto', 'scatter', 'density'):
+        raise ValueError(f"render_mode must be 'auto', 'scatter' or 'density'; got {render_mode!r}")
 
-    BVs = []
-    Mvs = []
-    hips = []
-    for hipid, data in hip.items():
-        d = parallax_to_distance(data['parallax'])
-        M = apparent_to_absolute_magnitude(data['Vmag'], d)
-        BVs.append(data['BV'])
-        Mvs.append(M)
-        hips.append(hipid)
-    BVs = np.array(BVs)
-    Mvs = np.array(Mvs)
+    catalogue = read_catalogue(filename)
 
-    colors_norm, cmap = star_colormap(BVs)
+    # Stars without a positive parallax have no distance
+    catalogue = catalogue[catalogue['parallax'] > 0]
+    BVs = catalogue['BV']
+    Mvs = apparent_to_absolute_magnitude(catalogue['Vmag'], parallax_to_distance(catalogue['parallax']))
+
+    if render_mode == 'auto':
+        render_mode = 'density' if len(BVs) > DENSITY_THRESHOLD else 'scatter'
 
     fig, ax = plt.subplots(figsize=(6, 8))
-    sc = ax.scatter(BVs, Mvs,
-                    c=colors_norm,
-                    cmap=cmap,
-                    s=8, edgecolors='none')
+    if render_mode == 'density':
+        image, extent = density_image(BVs, Mvs)
+        ax.imshow(image, extent=extent, origin='lower', aspect='auto', interpolation='nearest')
+    else:
+        sc = ax.scatter(BVs, Mvs,
+                        c=bv_to_rgba(BVs),
+                        s=8, edgecolors='none')
 
     ax.invert_yaxis()  # brighter (smaller Mv) at top
     ax.set_xlabel('B–V color index')
@@ -110,13 +186,11 @@ def main():
     ax.grid(True, linestyle=':', alpha=0.3)
 
     # Brightest stars
-    for hipid, name in brightest.items():
-        if hipid in hip:
-            bv = hip[hipid]['BV']
-            d = parallax_to_distance(hip[hipid]['parallax'])
-            M = apparent_to_absolute_magnitude(hip[hipid]['Vmag'], d)
+    positions = find_stars(catalogue, [int(hipid) for hipid in brightest])
+    for position, name in zip(positions, brightest.values()):
+        if position >= 0:
             ax.annotate(name,
-                        xy=(bv, M),
+                        xy=(BVs[position], Mvs[position]),
                         xytext=(5, -5),
                         textcoords='offset points',
                         fontsize=8,
@@ -124,29 +198,20 @@ def main():
                         weight='bold')
 
     # 6) Right y-axis: luminosity L/L_sun
-    def mv_to_lum(mv):  return 10**(0.4*(M_SUN - mv))
-    def lum_to_mv(l):   return M_SUN - 2.5*math.log10(l)
-
     ax2 = ax.twinx()
     ax2.set_ylim(ax.get_ylim())
-    mv_ticks = np.arange(math.floor(min(Mvs)),
-                         math.ceil(max(Mvs)) + 1, 2)
+    mv_ticks = np.arange(math.floor(np.min(Mvs)),
+                         math.ceil(np.max(Mvs)) + 1, 2)
     ax.set_yticks(mv_ticks)
-    lum_ticks = [mv_to_lum(m) for m in mv_ticks]
+    lum_ticks = magnitude_to_luminosity(mv_ticks)
     ax2.set_yticks(mv_ticks)
     ax2.set_yticklabels([f"{l:.1e}" for l in lum_ticks])
     ax2.set_ylabel(r'Luminosity $L/L_\odot$')
 
     # Top axis: spectral class + T_eff
-    bv_ticks = np.array([-0.33, -0.02, 0.15,
-                         0.44, 0.58, 0.81, 1.40])
-    classes = ['O', 'B', 'A', 'F', 'G', 'K', 'M']
-    # approximated T_eff formula
-    def bv_to_temp(bv):
-        return 4600 * (1/(0.92*bv+1.7) + 1/(0.92*bv+0.62))
-
-    temps = [int(bv_to_temp(bv)) for bv in bv_ticks]
-    top_labels = [f"{cl}\n{t}" for cl, t in zip(classes, temps)]
+    bv_ticks = SPECTRAL_CLASS_TICKS_BV
+    temps = bv_to_temperature(bv_ticks).astype(int)
+    top_labels = [f"{cl}\n{t}" for cl, t in zip(SPECTRAL_CLASSES, temps)]
 
     ax_top = ax.twiny()
     ax_top.set_xlim(ax.get_xlim())
@@ -165,4 +230,7 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # Optional catalogue filename, and --scatter or --density to override the automatic choice
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith('--')]
+    mode = 'density' if '--density' in sys.argv else 'scatter' if '--scatter' in sys.argv else 'auto'
+    main(arguments[0] if arguments else 'hipparcos_data.txt', mode)
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Vectorized photometric conversions for whole catalogue columns: B-V to effective
+temperature, absolute magnitude to luminosity, bolometric corrections, and spectral
+classes from B-V, with per-class aggregates for the HR diagram
+"""
+
+import numpy as np
+
+# Absolute V and bolometric magnitudes of the Sun
+M_SUN = 4.83
+M_BOL_SUN = 4.74
+
+# Spectral classes and the main-sequence B-V where each class after the first begins
+# (B0V at -0.30, A0V at -0.02, F0V at 0.30, G0V at 0.58, K0V at 0.81, M0V at 1.40)
+SPECTRAL_CLASSES = np.array(['O', 'B', 'A', 'F', 'G', 'K', 'M'])
+SPECTRAL_CLASS_BV_EDGES = np.array([-0.30, -0.02, 0.30, 0.58, 0.81, 1.40])
+
+# Flower (1996) bolometric correction polynomials in log10(T_eff), coefficients in
+# increasing powers as corrected by Torres (2010), for log10(T_eff) below 3.70,
+# from 3.70 to 3.90, and above 3.90
+BOLOMETRIC_CORRECTION_EDGES = np.array([3.70, 3.90])
+BOLOMETRIC_CORRECTION_COEFFICIENTS = np.array([
+    [-0.190537291496456e+05, 0.155144866764412e+05, -0.421278819301717e+04,
+     0.381476328422343e+03, 0.0, 0.0],
+    [-0.370510203809015e+05, 0.385672629965804e+05, -0.150651486316025e+05,
+     0.261724637119416e+04, -0.170623810323864e+03, 0.0],
+    [-0.118115450538963e+06, 0.137145973583929e+06, -0.636233812100225e+05,
+     0.147412923562646e+05, -0.170587278406872e+04, 0.788731721804990e+02],
+])
+
+
+def bv_to_temperature(BV):
+    """
+    Effective temperature in kelvin from the B-V color index (Ballesteros 2012).
+    """
+    BV = np.asarray(BV, dtype=float)
+    return 4600 * (1 / (0.92 * BV + 1.7) + 1 / (0.92 * BV + 0.62))
+
+
+def magnitude_to_luminosity(Mv):
+    """
+    V-band luminosity L/L_sun from the absolute V magnitude.
+    """
+    return 10 ** (0.4 * (M_SUN - np.asarray(Mv, dtype=float)))
+
+
+def luminosity_to_magnitude(luminosity):
+    """
+    Absolute V magnitude from the V-band luminosity L/L_sun.
+    """
+    return M_SUN - 2.5 * np.log10(luminosity)
+
+
+def bolometric_correction(temperature):
+    """
+    Bolometric correction BC_V = M_bol - M_V for effective temperatures in kelvin,
+    evaluating the polynomial of each star's temperature range in one pass.
+    """
+    log_temperature = np.log10(np.asarray(temperature, dtype=float))
+    coefficients = BOLOMETRIC_CORRECTION_COEFFICIENTS[
+        np.searchsorted(BOLOMETRIC_CORRECTION_EDGES, log_temperature, side='right')]
+    # Horner's rule over the coefficient columns, highest power first
+    correction = np.zeros_like(log_temperature)
+    for power in range(coefficients.shape[-1] - 1, -1, -1):
+        correction = correction * log_temperature + coefficients[..., power]
+    return correction
+
+
+def bolometric_luminosity(Mv, BV):
+    """
+    Bolometric luminosity L/L_sun from the absolute V magnitude and B-V color.
+    """
+    bolometric_magnitude = np.asarray(Mv, dtype=float) + bolometric_correction(bv_to_temperature(BV))
+    return 10 ** (0.4 * (M_BOL_SUN - bolometric_magnitude))
+
+
+def spectral_class_index(BV):
+    """
+    Position in SPECTRAL_CLASSES of each star's class, from its B-V color.
+    """
+    return np.searchsorted(SPECTRAL_CLASS_BV_EDGES, np.asarray(BV, dtype=float), side='right')
+
+
+def spectral_class(BV):
+    """
+    Spectral class letter of each star, from its B-V color.
+    """
+    return SPECTRAL_CLASSES[spectral_class_index(BV)]
+
+
+def classify_stars(BV, Mv):
+    """
+    Structured array with the photometric quantities of every star: B-V, M_V,
+    T_eff, V-band and bolometric L/L_sun, bolometric correction and spectral class.
+    """
+    BV = np.asarray(BV, dtype=float)
+    temperature = bv_to_temperature(BV)
+    correction = bolometric_correction(temperature)
+
+    stars = np.zeros(BV.shape, dtype=[
+        ('BV', float),
+        ('Mv', float),
+        ('temperature', float),
+        ('luminosity', float),
+        ('bolometric_correction', float),
+        ('bolometric_luminosity', float),
+        ('spectral_class', 'U1'),
+    ])
+    stars['BV'] = BV
+    stars['Mv'] = Mv
+    stars['temperature'] = temperature
+    stars['luminosity'] = magnitude_to_luminosity(Mv)
+    stars['bolometric_correction'] = correction
+    stars['bolometric_luminosity'] = 10 ** (0.4 * (M_BOL_SUN - (stars['Mv'] + correction)))
+    stars['spectral_class'] = spectral_class(BV)
+    return stars
+
+
+def spectral_class_summary(BV, Mv):
+    """
+    One row per spectral class with its number of stars and their mean B-V, M_V,
+    T_eff and bolometric L/L_sun (NaN for classes without stars).
+    """
+    BV = np.asarray(BV, dtype=float)
+    Mv = np.asarray(Mv, dtype=float)
+    index = spectral_class_index(BV)
+    number_of_classes = len(SPECTRAL_CLASSES)
+
+    counts = np.bincount(index, minlength=number_of_classes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        def class_mean(values):
+            return np.bincount(index, weights=values, minlength=number_of_classes) / counts
+
+        summary = np.zeros(number_of_classes, dtype=[
+            ('spectral_class', 'U1'),
+            ('count', int),
+            ('mean_BV', float),
+            ('mean_Mv', float),
+            ('mean_temperature', float),
+            ('mean_bolometric_luminosity', float),
+        ])
+        summary['spectral_class'] = SPECTRAL_CLASSES
+        summary['count'] = counts
+        summary['mean_BV'] = class_mean(BV)
+        summary['mean_Mv'] = class_mean(Mv)
+        summary['mean_temperature'] = class_mean(bv_to_temperature(BV))
+        summary['mean_bolometric_luminosity'] = class_mean(bolometric_luminosity(Mv, BV))
+    return summary
+
+
+if __name__ == '__main__':
+    # The Sun (B-V = 0.65, M_V = 4.83) and a few main-sequence stars
+    test_BV = np.array([-0.33, -0.17, 0.0, 0.30, 0.65, 1.0, 1.5])
+    test_Mv = np.array([-4.0, -1.2, 0.6, 2.7, 4.83, 6.5, 9.0])
+
+    for star in classify_stars(test_BV, test_Mv):
+        print(f"B-V = {star['BV']:5.2f}  class {star['spectral_class']}  T_eff = {star['temperature']:7.0f} K  "
+              f"BC = {star['bolometric_correction']:6.3f}  L_bol = {star['bolometric_luminosity']:.3g} L_sun")
+
+    print()
+    for row in spectral_class_summary(test_BV, test_Mv):
+        print(f"{row['spectral_class']}: {row['count']} stars, mean T_eff = {row['mean_temperature']:.0f} K")
@@ -0,0 +1,133 @@
+"""
+Catalogue index for fast star queries: a k-d tree over the HR plane (B-V, M_V) for
+nearest-star searches, a B-V ordering for box queries, and sort permutations
+computed once for distance, brightness and luminosity rankings
+"""
+
+import sys
+import numpy as np
+
+from make_hertzsprung_russell_diagram import (apparent_to_absolute_magnitude, meters_to_parsec,
+                                              parallax_to_distance, read_catalogue)
+from photometry import magnitude_to_luminosity
+
+# Fields ranked by build_star_index when the star table has them
+SORT_FIELDS = ('distance', 'brightness', 'luminosity')
+
+
+def hipparcos_star_table(catalogue):
+    """
+    Star table for build_star_index from a read_catalogue array: HIP id, B-V, M_V,
+    distance in parsecs, apparent V magnitude, brightness (V-band flux relative to a
+    V = 0 star, larger is brighter, as in sort_stars_data.py) and V-band luminosity
+    L/L_sun. Stars without a positive parallax are left out.
+    """
+    catalogue = catalogue[catalogue['parallax'] > 0]
+    distances = parallax_to_distance(catalogue['parallax'])
+
+    stars = np.zeros(len(catalogue), dtype=[
+        ('hip', np.int64),
+        ('BV', float),
+        ('Mv', float),
+        ('distance', float),
+        ('Vmag', float),
+        ('brightness', float),
+        ('luminosity', float),
+    ])
+    stars['hip'] = catalogue['hip']
+    stars['BV'] = catalogue['BV']
+    stars['Mv'] = apparent_to_absolute_magnitude(catalogue['Vmag'], distances)
+    stars['distance'] = distances * meters_to_parsec
+    stars['Vmag'] = catalogue['Vmag']
+    stars['brightness'] = 10 ** (-0.4 * catalogue['Vmag'])
+    stars['luminosity'] = magnitude_to_luminosity(stars['Mv'])
+    return stars
+
+
+def build_star_index(stars, plane_scale=(1.0, 1.0), sort_fields=SORT_FIELDS):
+    """
+    Index of a structured star table. With 'BV' and 'Mv' fields it holds a k-d tree
+    over (B-V / plane_scale[0], M_V / plane_scale[1]) and the stars ordered by B-V;
+    every field of sort_fields present in the table gets a stable ascending sort
+    permutation, with NaNs last. Stars with non-finite B-V or M_V are left out of
+    the HR-plane queries.
+    """
+    from scipy.spatial import cKDTree
+
+    index = {'stars': stars, 'orders': {}, 'finite_counts': {}}
+    names = stars.dtype.names
+
+    if 'BV' in names and 'Mv' in names:
+        plane_scale = np.asarray(plane_scale, dtype=float)
+        points = np.column_stack([stars['BV'], stars['Mv']])
+        plane_positions = np.flatnonzero(np.all(np.isfinite(points), axis=1))
+        index['plane_scale'] = plane_scale
+        index['plane_positions'] = plane_positions
+        index['tree'] = cKDTree(points[plane_positions] / plane_scale)
+
+        BV_order = plane_positions[np.argsort(stars['BV'][plane_positions], kind='stable')]
+        index['BV_order'] = BV_order
+        index['BV_sorted'] = stars['BV'][BV_order]
+
+    for field in sort_fields:
+        if field in names:
+            index['orders'][field] = np.argsort(stars[field], kind='stable')
+            index['finite_counts'][field] = np.count_nonzero(~np.isnan(stars[field]))
+    return index
+
+
+def nearest_stars(index, BV, Mv, k=1):
+    """
+    Positions in the star table of the k stars nearest to (B-V, M_V) in the scaled
+    HR plane, nearest first, and their scaled distances. BV and Mv may be arrays of
+    query points, giving arrays of shape (number of queries, k).
+    """
+    query = np.stack(np.broadcast_arrays(BV, Mv), axis=-1) / index['plane_scale']
+    distances, tree_positions = index['tree'].query(query, k=[*range(1, k + 1)])
+    return index['plane_positions'][tree_positions], distances
+
+
+def stars_in_box(index, BV_range, Mv_range):
+    """
+    Positions in the star table of the stars with B-V and M_V inside the given
+    (low, high) ranges, inclusive, in order of increasing B-V.
+    """
+    low = np.searchsorted(index['BV_sorted'], BV_range[0], side='left')
+    high = np.searchsorted(index['BV_sorted'], BV_range[1], side='right')
+    candidates = index['BV_order'][low:high]
+    Mvs = index['stars']['Mv'][candidates]
+    return candidates[(Mvs >= Mv_range[0]) & (Mvs <= Mv_range[1])]
+
+
+def top_stars(index, field, n=10, largest=True):
+    """
+    Positions in the star table of the n stars with the largest (or smallest) values
+    of a sorted field, ignoring NaNs, from the precomputed permutation.
+    """
+    order = index['orders'][field][:index['finite_counts'][field]]
+    return order[::-1][:n] if largest else order[:n]
+
+
+if __name__ == '__main__':
+    import time
+
+    # Catalogue file as in make_hertzsprung_russell_diagram, default hipparcos_data.txt
+    star_table = hipparcos_star_table(read_catalogue(sys.argv[1] if len(sys.argv) > 1 else 'hipparcos_data.txt'))
+
+    start = time.perf_counter()
+    star_index = build_star_index(star_table)
+    print(f"Indexed {len(star_table)} stars in {time.perf_counter() - start:.3f} s")
+
+    queries = {
+        '5 nearest to the Sun in the HR plane': lambda: nearest_stars(star_index, 0.65, 4.83, k=5)[0],
+        'main-sequence G box': lambda: stars_in_box(star_index, (0.58, 0.81), (4.0, 6.0)),
+        'top 5 by luminosity': lambda: top_stars(star_index, 'luminosity', 5),
+        'top 5 by apparent brightness': lambda: top_stars(star_index, 'brightness', 5),
+        '5 nearest by distance': lambda: top_stars(star_index, 'distance', 5, largest=False),
+    }
+    for description, query in queries.items():
+        start = time.perf_counter()
+        positions = query()
+        elapsed = time.perf_counter() - start
+        print(f"{description}: {len(positions)} stars in {elapsed * 1e3:.3f} ms, "
+              f"HIP {star_table['hip'][positions[:5]].tolist()}")
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def main():
     nearby_star_data = [
         ("Alpha Centauri A",   4.3,  0.26,    1.56),
@@ -13,28 +16,32 @@ def main():
         ("Ross 154",           9.4,  0.00002, 0.0005),
     ]
 
-    by_distance = sorted(nearby_star_data, key=lambda star: star[1])
-    by_brightness = sorted(nearby_star_data, key=lambda star: star[2])
-    by_luminosity = sorted(nearby_star_data, key=lambda star: star[3])
+    # Columns of the table, each sort permutation computed once with a stable argsort
+    # (same order as sorted() for ties) and reused for every lookup
+    names = np.array([star[0] for star in nearby_star_data])
+    columns = np.array([star[1:] for star in nearby_star_data]).T
+    distance, brightness, luminosity = columns
+    orders = {field: np.argsort(column, kind='stable')
+              for field, column in zip(('distance', 'brightness', 'luminosity'), columns)}
 
     print("Stars sorted by distance (light years):")
     print(f"{'Star':<20} {'Distance (ly)':>12}")
     print("-" * 34)
-    for name, dist, _, _ in by_distance:
+    for name, dist in zip(names[orders['distance']], distance[orders['distance']]):
         print(f"{name:<20} {dist:12.2f}")
     print()
 
     print("Stars sorted by apparent brightness (relative to Sirius A):")
     print(f"{'Star':<20} {'Brightness':>12}")
     print("-" * 34)
-    for name, _, bright, _ in by_brightness:
+    for name, bright in zip(names[orders['brightness']], brightness[orders['brightness']]):
         print(f"{name:<20} {bright:12.6f}")
     print()
 
     print("Stars sorted by luminosity (relative to Sun):")
     print(f"{'Star':<20} {'Luminosity':>12}")
     print("-" * 34)
-    for name, _, _, lum in by_luminosity:
+    for name, lum in zip(names[orders['luminosity']], luminosity[orders['luminosity']]):
         print(f"{name:<20} {lum:12.2f}")
     print()
 
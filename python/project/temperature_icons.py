@@ -1,8 +1,14 @@
+import os
+import sys
+
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.patches import Rectangle, Circle
 
+# Shared, memoized gradient lookup tables live next to the HR diagram script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dictionaries-and-strings"))
+from color_lookup import gradient_colormap  # noqa: E402
+
 # Data given
 planets = [
     "Mercury",
@@ -36,6 +42,9 @@ BULB_LINE_WIDTH = 3      # Thickness of the bulb outline
 OUTER_FRAME_WIDTH = 6    # Thickness of the outer frame around entire plot
 MARKER_LINE_WIDTH = 4    # Thickness of the marker line
 
+# Vertical 0 → 1 ramp drawn through the colormap inside every tube
+GRADIENT = np.linspace(0.0, 1.0, 256).reshape(-1, 1)
+
 
 def plot_single_thermometer(planet, temp_min_c, temp_max_c, cmap):
     """
@@ -75,9 +84,8 @@ def plot_single_thermometer(planet, temp_min_c, temp_max_c, cmap):
     )
 
     # Gradient fill
-    grad = np.linspace(0.0, 1.0, 256).reshape(-1, 1)
     ax.imshow(
-        grad,
+        GRADIENT,
         extent=[
             0.5 - tube_width / 2,
             0.5 + tube_width / 2,
@@ -128,9 +136,9 @@ def plot_single_thermometer(planet, temp_min_c, temp_max_c, cmap):
 
 if __name__ == "__main__":
     # Colored gradient
-    cmap_color = LinearSegmentedColormap.from_list("blue_red", ["blue", "red"])
+    cmap_color = gradient_colormap((0.0, 1.0), ("blue", "red"), "blue_red")
     # Greyscale gradient
-    cmap_gray = LinearSegmentedColormap.from_list("black_white", ["black", "white"])
+    cmap_gray = gradient_colormap((0.0, 1.0), ("black", "white"), "black_white")
 
     # Plot and save coloured thermometers
     for planet, min_k, max_k in zip(planets, mins_K, maxs_K):